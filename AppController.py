@@ -1,8 +1,23 @@
-from DataFile import load_data_file
+from ChangeModel import Dirty
+from DataCache import load_data_file_cached
+from DataFile import LazyDataFile, load_data_file_lazy
+from DataRegistry import default_registry
 from Curves import Curve
 from PlotConfig import PlotConfig
+from RenderScheduler import RenderScheduler
 import json
 import os
+
+
+def resolve_data_path(path, data_dir=None):
+    """Saved data file path, or the file of the same name in data_dir if it is gone."""
+    if data_dir and not os.path.exists(path):
+        moved = os.path.join(data_dir, path.replace("\\", "/").rsplit("/", 1)[-1])
+        if os.path.exists(moved):
+            return moved
+    return path
+
+
 # =========================
 # Controller
 # =========================
@@ -14,6 +29,145 @@ class AppController:
         self.curves = []
         self.config = PlotConfig()
         self.curve_counter = 1
+        # Back data files by memory-mapped cache entries: only plotted
+        # columns are paged in (see DataCache)
+        self.mmap_data_files = False
+        # Only index files when opened; parse each column on first use
+        # (see LazyDataFile). Takes precedence over mmap_data_files.
+        self.lazy_data_files = False
+        # Store the columns of in-RAM files in the smallest type holding them
+        # (see DataFile.compact); float32 also within this relative error
+        self.compact_data_files = False
+        self.compact_rtol = 0.0
+        # Files already in use in this process (other projects, controllers)
+        # are shared instead of loaded again (see DataRegistry)
+        self.registry = default_registry()
+        # Processes used to parse one large file (1 = parse in the calling thread)
+        self.parse_workers = os.cpu_count() or 1
+        # Names of the data files followed in tail mode (see poll_followed_files)
+        self.followed_files = set()
+        # Model changes not rendered yet (see ChangeModel); starts dirty
+        self.changes = Dirty.ALL
+        self.config.add_observer(self._on_model_changed)
+        # All redraws go through here: one render per event-loop turn at most
+        self.render_scheduler = RenderScheduler(self._render)
+
+    # ------------------------------------------------------------------
+    # Change tracking
+    # ------------------------------------------------------------------
+    def _on_model_changed(self, obj, flags):
+        self.mark_changed(flags)
+
+    def mark_changed(self, flags=Dirty.ALL):
+        """
+        Record a change the next render must show, and request that render:
+        all the edits of one interaction share it.
+        """
+        self.changes |= flags
+        self.request_render()
+
+    def _watch(self, curve):
+        curve.add_observer(self._on_model_changed)
+        return curve
+
+    def _unwatch(self, curve):
+        curve.remove_observer(self._on_model_changed)
+
+    def open_data_file(self, path, progress=None, cancel=None):
+        """
+        Load a data file with the storage mode selected on the controller,
+        or share the DataFile already in use for it (see DataRegistry).
+        Safe to call from a worker thread (see FileLoader).
+        """
+        if self.lazy_data_files:
+            return self.registry.open(path, load_data_file_lazy, ("lazy",), cancel)
+
+        def load(path):
+            df = load_data_file_cached(path, mmap=self.mmap_data_files,
+                                       progress=progress, cancel=cancel,
+                                       workers=self.parse_workers)
+            if self.compact_data_files:
+                df.compact(self.compact_rtol)
+            return df
+
+        if self.mmap_data_files:
+            mode = ("mmap",)
+        else:
+            mode = ("ram", self.compact_rtol if self.compact_data_files else None)
+        return self.registry.open(path, load, mode, cancel)
+
+    def register_data_file(self, file_name, data_file):
+        """Make a loaded DataFile available to curves under its display name."""
+        self.data_files[file_name] = data_file
+
+    # ------------------------------------------------------------------
+    # Follow (tail) mode
+    # ------------------------------------------------------------------
+    def follow_file(self, file_name, follow=True):
+        """
+        Start / stop following a data file that keeps growing on disk.
+        Following appends to the DataFile in place: the controller follows a
+        private copy, so the other users of the file (see DataRegistry) keep
+        the rows they loaded.
+        """
+        df = self.data_files[file_name]
+        if not follow:
+            self.followed_files.discard(file_name)
+            df.unfollow()
+            return
+        if not df.is_followed:
+            if isinstance(df, LazyDataFile):
+                # Tail mode needs the whole matrix in RAM
+                eager = self.registry.open(
+                    df.path, lambda path: load_data_file_cached(path, workers=self.parse_workers),
+                    ("ram", None))
+            else:
+                eager = df
+            own = eager.copy()
+            self._replace_data_file(df, own)
+            df = own
+            df.follow()
+        self.followed_files.add(file_name)
+
+    def poll_followed_files(self):
+        """
+        Parse what was appended to the followed files since the last poll and
+        push only those points into the plotted lines. Returns True if any grew.
+        """
+        grown = {}
+        for name in list(self.followed_files):
+            df = self.data_files.get(name)
+            if df is None:
+                self.followed_files.discard(name)
+                continue
+            try:
+                n = df.read_appended()
+            except (OSError, ValueError):
+                continue    # file being replaced: try again next poll
+            if n:
+                grown[id(df)] = n
+        if not grown:
+            return False
+
+        updates = []
+        for c in self.curves:
+            n = max(grown.get(id(c.x_data_file), 0), grown.get(id(c.y_data_file), 0))
+            if n:
+                updates.append((c, n))
+        self.canvas.update_curve_data(updates)
+        return True
+
+    def _replace_data_file(self, old, new):
+        for k, df in self.data_files.items():
+            if df is old:
+                self.data_files[k] = new
+        for c in self.curves:
+            if c.data_file is old:
+                c.data_file = new
+            if c.x_data_file is old:
+                c.x_data_file = new
+            if c.y_data_file is old:
+                c.y_data_file = new
 
     # def load_file(self, path):
     #     self.data_files[path] = load_data_file(path)
@@ -23,24 +177,28 @@ class AppController:
     def remove_file(self, file_name):
         if file_name in self.data_files:
             del self.data_files[file_name]
+            self.followed_files.discard(file_name)
             # Also remove any curves associated with this file
+            for c in self.curves:
+                if c.file_name == file_name:
+                    self._unwatch(c)
             self.curves = [c for c in self.curves if c.file_name != file_name]
-            self.update_plot()
+            self.mark_changed(Dirty.CURVES)
 
 
-    def add_curve(self, file_name, data_file, x_col, y_col, axis, color, palette_name="Plotly", marker=None, marker_size=None, linestyle="-", linewidth=2.0, x_data_file=None, y_data_file=None):
+    def add_curve(self, file_name, data_file, x_col, y_col, axis, color, palette_name="Plotly", marker=None, marker_size=None, linestyle="-", linewidth=2.0, x_data_file=None, y_data_file=None, decimation="auto"):
         name = f"Curve {self.curve_counter}"
         self.curve_counter += 1
-        curve = Curve(file_name, data_file, x_col, y_col, axis, name=name, color=color, palette_name=palette_name, marker=marker, marker_size=marker_size, linestyle=linestyle, linewidth=linewidth, x_data_file=x_data_file, y_data_file=y_data_file, subplot_index=0)
-        self.curves.append(curve)
-        self.update_plot()
+        curve = Curve(file_name, data_file, x_col, y_col, axis, name=name, color=color, palette_name=palette_name, marker=marker, marker_size=marker_size, linestyle=linestyle, linewidth=linewidth, x_data_file=x_data_file, y_data_file=y_data_file, subplot_index=0, decimation=decimation)
+        self.curves.append(self._watch(curve))
+        self.mark_changed(Dirty.CURVES)
         return curve
 
     def remove_curve(self, idx):
         if 0 <= idx < len(self.curves):
-            self.curves.pop(idx)
+            self._unwatch(self.curves.pop(idx))
+            self.mark_changed(Dirty.CURVES)
             # self.curve_counter -= 1
-            self.update_plot()
 
     def update_curve(self, idx, x_col, y_col, axis, color, palette_name="Plotly",  subplot_index=0):
         c = self.curves[idx]
@@ -56,8 +214,28 @@ class AppController:
         c.subplot_index = subplot_index
         # self.update_plot()
 
-    def update_plot(self):
+    def request_render(self, force=False):
+        """
+        Ask for a redraw on the next event-loop turn; requests made before it
+        runs are merged (see RenderScheduler). force=True redraws even if the
+        model did not change (resize, explicit "Plot").
+        """
+        self.render_scheduler.request(force)
+
+    def update_plot(self, force=False):
+        """Render pending changes right now (needed before touching canvas.axes)."""
+        self.render_scheduler.flush(force)
+
+    def _render(self, force=False):
+        # Nothing changed since the last render: the figure is up to date
+        if not (self.changes or force):
+            return False
+        self.changes = Dirty.NONE
+        self.config.clear_changes()
+        for c in self.curves:
+            c.clear_changes()
         self.canvas.draw_curves(self.curves, self.config)
+        return True
     
     def to_dict(self) -> dict:
         """Export the full editable plot state."""
@@ -102,6 +280,7 @@ class AppController:
                 "linestyle": c.linestyle,
                 "linewidth": c.linewidth,
                 "subplot_index": c.subplot_index,
+                "decimation": c.decimation,
 
             })
 
@@ -111,30 +290,39 @@ class AppController:
         with open(project_path, "w", encoding="utf-8") as f:
             json.dump(self.to_dict(), f, indent=2)
 
-    def load_project(self, project_path: str):
+    def load_project(self, project_path: str, data_dir=None):
         """
         Load project and rebuild controller state.
         If some data files are missing, we skip curves that depend on them,
         and you can warn the user.
+        Data files not found at their saved path are looked up by file name
+        in data_dir (e.g. a project saved on another machine).
         """
         import json
-        from DataFile import load_data_file
 
         with open(project_path, "r", encoding="utf-8") as f:
             obj = json.load(f)
 
-        # Reset current state
+        # Reset current state. The files of the previous project stay alive
+        # until the new one is open: files both use are shared, not reloaded.
+        previous = list(self.data_files.values())
         self.data_files.clear()
+        self.followed_files.clear()
+        for c in self.curves:
+            self._unwatch(c)
         self.curves.clear()
+        self.mark_changed(Dirty.CURVES)
 
         # Reload data files
         missing = []
         for key, path in obj.get("data_files", {}).items():
+            path = resolve_data_path(path, data_dir)
             if not os.path.exists(path):
                 missing.append((key, path))
                 continue
-            df = load_data_file(path)
+            df = self.open_data_file(path)
             self.data_files[key] = df
+        del previous
 
         # Restore config
         cfg = obj.get("config", {})
@@ -174,7 +362,8 @@ class AppController:
                 continue
 
             curve = self._make_curve_from_dict(c)
-            self.curves.append(curve)
+            self.curves.append(self._watch(curve))
+        # Render now: the limits below are applied to the new axes
         self.update_plot()
 
         # Finally, apply xlim/ylim per subplot if any
@@ -214,5 +403,6 @@ class AppController:
             y_data_file=y_df,
             name=d.get("name", "Curve"),
             subplot_index=d.get("subplot_index", 0),
+            decimation=d.get("decimation", "auto"),
         )
         return curve
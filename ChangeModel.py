@@ -0,0 +1,191 @@
+"""
+ChangeModel.py
+
+Dirty tracking for the plot model (Curve, PlotConfig).
+
+Attribute writes on an Observable record what kind of change happened
+(see Dirty) and notify its observers, e.g. AppController, which merges the
+flags and renders once per event-loop tick instead of once per edit.
+Writes that do not change the value are not recorded.
+
+Dict attributes listed in _TRACKED_DICTS (PlotConfig.subplots_config) are
+wrapped in TrackedDict, so `cfg.subplots_config.setdefault(i, {})["xlabel"] = ...`
+is seen as well.
+"""
+
+from contextlib import contextmanager
+from enum import IntFlag
+
+
+class Dirty(IntFlag):
+    NONE = 0
+    DATA = 1         # plotted columns / data files / decimation
+    STYLE = 2        # color, marker, line style...
+    LABEL = 4        # curve names (legend), axis labels
+    LAYOUT = 8       # subplot grid, sharing, figure ratio, curve placement
+    LIMITS = 16      # axis limits
+    AXES = 32        # ticks, grids
+    LEGEND = 64      # legend on/off
+    CURVES = 128     # curves added / removed (set by the controller)
+    ALL = 255
+
+
+_untracked = 0
+
+
+@contextmanager
+def untracked():
+    """Writes made inside this block are not recorded (e.g. syncing the model back from the figure)."""
+    global _untracked
+    _untracked += 1
+    try:
+        yield
+    finally:
+        _untracked -= 1
+
+
+class Observable:
+    """
+    Mixin recording attribute writes as Dirty flags.
+    Subclasses map attribute names to flags in _CHANGES; unlisted public
+    attributes count as Dirty.STYLE. Private ("_x") attributes are ignored.
+    """
+    _CHANGES = {}
+    _TRACKED_DICTS = ()
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+            return
+        if name in self._TRACKED_DICTS and not isinstance(value, TrackedDict):
+            value = TrackedDict(value, self._dict_changed(name))
+        missing = object()
+        old = self.__dict__.get(name, missing)
+        object.__setattr__(self, name, value)
+        if old is missing or _same(old, value):
+            return
+        self._mark(self._CHANGES.get(name, Dirty.STYLE))
+
+    @property
+    def changes(self):
+        """Flags recorded since the last clear_changes()."""
+        return self.__dict__.get("_changes", Dirty.NONE)
+
+    def clear_changes(self):
+        self._changes = Dirty.NONE
+
+    def add_observer(self, callback):
+        """callback(obj, flags) is called after every recorded change."""
+        observers = self.__dict__.setdefault("_observers", [])
+        if callback not in observers:
+            observers.append(callback)
+
+    def remove_observer(self, callback):
+        observers = self.__dict__.get("_observers", [])
+        if callback in observers:
+            observers.remove(callback)
+
+    def _mark(self, flags):
+        if not flags or _untracked:
+            return
+        self._changes = self.changes | flags
+        for cb in list(self.__dict__.get("_observers", ())):
+            cb(self, flags)
+
+    def _dict_changed(self, name):
+        return _DictNotifier(self, name)
+
+    def __getstate__(self):
+        # Observers (controller callbacks) are not part of the model
+        state = dict(self.__dict__)
+        state.pop("_observers", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for name in self._TRACKED_DICTS:
+            if name in state:
+                self.__dict__[name] = TrackedDict(state[name], self._dict_changed(name))
+
+
+class _DictNotifier:
+    """Maps a write to key `key` of a tracked dict to the owner's flags."""
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.name = name
+
+    def __call__(self, key):
+        changes = self.owner._CHANGES
+        self.owner._mark(changes.get((self.name, key), changes.get(self.name, Dirty.STYLE)))
+
+
+class TrackedDict(dict):
+    """
+    dict reporting writes to `notify(key)`. Nested dict values are tracked
+    too and report with their own keys (subplots_config[i]["xlabel"] -> "xlabel").
+    """
+    def __init__(self, data=(), notify=None):
+        super().__init__()
+        self._notify = notify
+        for k, v in dict(data).items():
+            super().__setitem__(k, self._wrap(v))
+
+    def _wrap(self, value):
+        if isinstance(value, dict) and not isinstance(value, TrackedDict):
+            return TrackedDict(value, self._notify)
+        return value
+
+    def _changed(self, key):
+        if self._notify is not None:
+            self._notify(key)
+
+    def __setitem__(self, key, value):
+        missing = object()
+        old = self.get(key, missing)
+        super().__setitem__(key, self._wrap(value))
+        if old is missing and isinstance(value, dict) and not value:
+            return  # setdefault(i, {}): nothing to show yet
+        if old is missing or not _same(old, value):
+            self._changed(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed(key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for k, v in dict(*args, **kwargs).items():
+            self[k] = v
+
+    def pop(self, key, *default):
+        had = key in self
+        value = super().pop(key, *default)
+        if had:
+            self._changed(key)
+        return value
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._changed(key)
+        return key, value
+
+    def clear(self):
+        keys = list(self)
+        super().clear()
+        for k in keys:
+            self._changed(k)
+
+    def __reduce__(self):
+        # Copies / pickles are plain dicts: Observable re-wraps on assignment
+        return (dict, (dict(self),))
+
+
+def _same(a, b):
+    try:
+        return bool(a == b)
+    except Exception:   # e.g. numpy arrays
+        return a is b
@@ -1,6 +1,19 @@
 
-class Curve:
-    def __init__(self, file_name, data_file, x_col, y_col, axis="primary", name=None, color = None, palette_name="Plotly", marker=None, marker_size=None, marker_face_color=None, marker_edge_color=None, linestyle="-", linewidth=2.0, x_data_file=None, y_data_file=None, subplot_index=0):
+from ChangeModel import Dirty, Observable
+
+
+class Curve(Observable):
+    # What an attribute write invalidates (see ChangeModel)
+    _CHANGES = {
+        "data_file": Dirty.DATA, "x_data_file": Dirty.DATA, "y_data_file": Dirty.DATA,
+        "x_col": Dirty.DATA, "y_col": Dirty.DATA, "decimation": Dirty.DATA,
+        "marker": Dirty.STYLE | Dirty.DATA,  # auto decimation depends on markers
+        "name": Dirty.LABEL,
+        "axis": Dirty.LAYOUT, "subplot_index": Dirty.LAYOUT,
+        "file_name": Dirty.NONE, "palette_name": Dirty.NONE,
+    }
+
+    def __init__(self, file_name, data_file, x_col, y_col, axis="primary", name=None, color = None, palette_name="Plotly", marker=None, marker_size=None, marker_face_color=None, marker_edge_color=None, linestyle="-", linewidth=2.0, x_data_file=None, y_data_file=None, subplot_index=0, decimation="auto"):
         
         self.file_name = file_name 
         self.data_file = data_file
@@ -20,6 +33,7 @@ class Curve:
         self.marker_size = marker_size
         self.marker_face_color = marker_face_color
         self.marker_edge_color = marker_edge_color
+        self.decimation = decimation  # see Decimation.DECIMATION_MODES
         self._mpl_line = None  # Matplotlib Line2D object after plotting
 
     @property
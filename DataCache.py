@@ -0,0 +1,223 @@
+"""
+DataCache.py
+
+Persistent on-disk cache of parsed data files.
+
+Each entry is a pair of files named after the source path:
+- <key>.npy  : the float matrix (np.save format, column-major)
+- <key>.json : source path, mtime, size, parser version, headers, the
+               FormatProfile sniffed and the LoadDiagnostics of the parse
+
+An entry is only used if the source file still has the same mtime/size and
+was parsed by the same PARSER_VERSION; otherwise it is dropped on lookup.
+The cache directory is kept under `max_bytes` by evicting the least
+recently used entries.
+
+Entries can be opened memory-mapped: columns are contiguous on disk, so
+only the columns actually read (e.g. by Curve.xy()) get paged in.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from DataFile import DataFile, LoadDiagnostics, load_data_file, PARSER_VERSION
+from Helpers import FormatProfile
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "PYQT_PLOTTER_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "pyqt_plotter"),
+)
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3  # 4 GB
+
+# Bump when the entry files change: older entries are then dropped on lookup
+CACHE_FORMAT = 2
+
+
+class DataCache:
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+    def _entry_paths(self, path):
+        """(meta_path, data_path) of the entry for a source file."""
+        # Canonical path (as DataRegistry): a file reached through a symlink
+        # shares the entry of its target
+        src = os.path.normcase(os.path.realpath(path))
+        key = hashlib.sha1(src.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".npy"
+
+    @staticmethod
+    def _source_key(path, size=None):
+        st = os.stat(path)
+        return {
+            "path": os.path.realpath(path),
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size if size is None else size,
+            "parser_version": PARSER_VERSION,
+            "format": CACHE_FORMAT,
+        }
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+    def get(self, path, mmap=False):
+        """
+        Return the cached DataFile for `path`, or None on miss / stale entry.
+        With mmap=True the data is a read-only np.memmap instead of an in-RAM copy.
+        """
+        meta_path, data_path = self._entry_paths(path)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            fresh = meta.get("source") == self._source_key(path)
+        except OSError:
+            fresh = False
+        if not fresh:
+            self._remove(meta_path, data_path)
+            return None
+
+        try:
+            data = np.load(data_path, mmap_mode="r" if mmap else None)
+        except (OSError, ValueError):
+            self._remove(meta_path, data_path)
+            return None
+
+        # Mark as recently used (LRU order = meta file mtime)
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+        profile = meta.get("profile")
+        profile = FormatProfile.from_dict(profile) if profile is not None else None
+        diag = meta.get("diagnostics")
+        diag = LoadDiagnostics.from_dict(diag, profile) if diag is not None else None
+        return DataFile(path, list(meta["headers"]), data, source_end=meta["source"]["size"],
+                        profile=profile, diagnostics=diag)
+
+    def put(self, data_file):
+        """Store a parsed DataFile. Best effort: cache failures never break loading."""
+        meta_path, data_path = self._entry_paths(data_file.path)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            meta = {
+                # Keyed on the bytes actually parsed: a file that grew while
+                # loading never matches its (shorter) entry
+                "source": self._source_key(data_file.path, data_file.source_end),
+                "headers": list(data_file.headers),
+                # follow() reuses the profile; the window shows the diagnostics
+                "profile": data_file.profile.to_dict() if data_file.profile is not None else None,
+                "diagnostics": (data_file.diagnostics.to_dict()
+                                if data_file.diagnostics is not None else None),
+            }
+            # Write data first, meta last: an entry without meta is never read.
+            # Unique temp names: two processes / threads may store the same file.
+            self._write_atomic(data_path, lambda f: np.save(f, np.asfortranarray(data_file.data)))
+            self._write_atomic(meta_path, lambda f: f.write(json.dumps(meta).encode("utf-8")))
+        except OSError:
+            self._remove(meta_path, data_path)
+            return
+        self.evict()
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+
+        entries = []
+        total = 0
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(self.cache_dir, name)
+            data_path = meta_path[:-len(".json")] + ".npy"
+            try:
+                st = os.stat(meta_path)
+                size = st.st_size + os.path.getsize(data_path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, size, meta_path, data_path))
+            total += size
+
+        entries.sort()  # oldest first
+        for _, size, meta_path, data_path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(meta_path, data_path)
+            total -= size
+
+    def clear(self):
+        """Remove every entry of the cache."""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith((".json", ".npy", ".tmp")):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def _write_atomic(self, path, write):
+        """Fill a new temp file with write(binary file), then move it to path."""
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            self._remove(tmp)
+            raise
+
+    @staticmethod
+    def _remove(*paths):
+        for p in paths:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+
+_default_cache = None
+
+def default_cache() -> DataCache:
+    """Process-wide cache in DEFAULT_CACHE_DIR."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DataCache()
+    return _default_cache
+
+
+def load_data_file_cached(path: str, cache=None, mmap=False, progress=None, cancel=None, workers=None) -> DataFile:
+    """
+    load_data_file() through the parsed-file cache.
+    With mmap=True the returned DataFile is backed by the memory-mapped cache
+    entry (the freshly parsed in-RAM copy is dropped on a miss).
+    progress / cancel / workers are forwarded to load_data_file() on a miss.
+    """
+    cache = cache or default_cache()
+    df = cache.get(path, mmap=mmap)
+    if df is None:
+        df = load_data_file(path, progress=progress, cancel=cancel, workers=workers)
+        cache.put(df)
+        if mmap:
+            # Fall back to the in-RAM copy if the entry could not be written
+            df = cache.get(path, mmap=True) or df
+    return df
@@ -1,17 +1,414 @@
+import copy
+import io
+import multiprocessing
 import os
+import re
+import threading
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+
 import numpy as np
 
-from Helpers import detect_delimiter, split_line, parse_float
+from Decimation import MinMaxPyramid, is_sorted
+from Helpers import detect_delimiter, sniff_format, split_line, parse_float
+
+# Bump whenever parsing results may change, so cached parses get invalidated.
+PARSER_VERSION = 3
+
+# Size (in bytes) of the body blocks handed to the bulk parser.
+_BLOCK_BYTES = 1 << 22
+# Blocks the bulk parser rejects are bisected down to this size, so a malformed
+# row only sends a few lines around it down the slow path.
+_MIN_BLOCK_CHARS = 1 << 12
+
+# LazyDataFile: a block with rows to drop is checked in this many parts,
+# recursively, to narrow the strictly parsed ranges down (see _split_block)
+_SPLIT_WAYS = 16
+
+# Bodies with at least this many blocks get parsed on a process pool
+# when load_data_file() is given workers > 1.
+_PARALLEL_MIN_BLOCKS = 4
+
+_COMMENT_PREFIXES = ("#", "%", "//")
+
+# Split point after a lone "\r" (classic Mac line ending)
+_cr_split_re = re.compile(rb"(?<=\r)(?!\n)")
+
+# Characters a purely numeric block may contain, besides its delimiter.
+_NUMERIC_BYTES = b"0123456789eE+-. \t\n"
+
+_quoted_field_res = {}
+
+# How far back follow() looks for the start of an unterminated last line.
+_TAIL_PEEK_BYTES = 1 << 16
+
+# compact(): columns with at most this many distinct values are stored as
+# uint8 codes into a table of the values (checked on a head sample first)
+_CATEGORICAL_MAX = 256
+_CATEGORICAL_MIN_ROWS = 4 * _CATEGORICAL_MAX
+_CATEGORICAL_SAMPLE = 4096
+
+# Format sniffing sample: first content lines, then a few lines read at
+# evenly spaced offsets of the body (see _sample_lines)
+_SNIFF_HEAD_LINES = 64
+_SNIFF_BODY_SAMPLES = 8
+_SNIFF_SAMPLE_BYTES = 4096
+
+class LoadCancelled(Exception):
+    """Raised by load_data_file() when its cancel event gets set."""
+
+
+class LoadDiagnostics:
+    """
+    What load_data_file() skipped while reading a file with its sniffed
+    FormatProfile: rows with the wrong number of fields or non-numeric
+    fields, and among them rows with a number written against the file's
+    convention (e.g. "1.5" in a decimal-comma file), which are reported here
+    rather than re-guessed field by field.
+    """
+    MAX_SAMPLES = 20
+
+    def __init__(self, profile=None):
+        self.profile = profile
+        self.rows = 0                   # rows loaded
+        self.skipped_rows = 0           # rows dropped, all reasons
+        self.inconsistent_rows = 0      # ... because of a number in another convention
+        self.samples = []               # first (reason, line) dropped
+
+    @property
+    def ambiguous(self):
+        """The file mixes number conventions: fields were parsed one by one with parse_float."""
+        return self.profile is not None and self.profile.ambiguous
+
+    @property
+    def has_issues(self):
+        return bool(self.skipped_rows or self.ambiguous)
+
+    def skip(self, line, reason):
+        self.skipped_rows += 1
+        if reason == "convention":
+            self.inconsistent_rows += 1
+        if len(self.samples) < self.MAX_SAMPLES:
+            self.samples.append((reason, line))
+
+    def merge(self, other):
+        self.skipped_rows += other.skipped_rows
+        self.inconsistent_rows += other.inconsistent_rows
+        room = self.MAX_SAMPLES - len(self.samples)
+        if room > 0:
+            self.samples += other.samples[:room]
+
+    def to_dict(self):
+        """JSON-able counts and samples (see DataCache), read back with from_dict()."""
+        return {"rows": self.rows, "skipped_rows": self.skipped_rows,
+                "inconsistent_rows": self.inconsistent_rows,
+                "samples": [list(s) for s in self.samples]}
+
+    @classmethod
+    def from_dict(cls, d, profile=None):
+        diag = cls(profile)
+        diag.rows = d["rows"]
+        diag.skipped_rows = d["skipped_rows"]
+        diag.inconsistent_rows = d["inconsistent_rows"]
+        diag.samples = [tuple(s) for s in d["samples"]]
+        return diag
+
+    def summary(self):
+        parts = [f"{self.rows} rows"]
+        if self.skipped_rows:
+            parts.append(f"{self.skipped_rows} skipped")
+        if self.inconsistent_rows:
+            p = self.profile
+            parts.append(f"{self.inconsistent_rows} with numbers not in the file convention "
+                         f"(decimal {p.decimal!r}, thousands {p.thousands!r})")
+        if self.ambiguous:
+            parts.append("mixed decimal conventions, guessed per field")
+        return ", ".join(parts)
+
+    def __repr__(self):
+        return f"LoadDiagnostics({self.summary()})"
+
+
+class _Categorical:
+    """
+    Column of few distinct values: uint8 codes into a table of the values.
+    The decoded column is shared by everyone using it and freed with its
+    last user (weak reference), so it is in RAM at most once.
+    """
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+        self._decoded = None    # weakref to the last decoded column
+
+    @property
+    def nbytes(self):
+        decoded = self._decoded() if self._decoded is not None else None
+        return (self.codes.nbytes + self.categories.nbytes
+                + (decoded.nbytes if decoded is not None else 0))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def decode(self):
+        col = self._decoded() if self._decoded is not None else None
+        if col is None:
+            col = self.categories[self.codes]
+            self._decoded = weakref.ref(col)
+        return col
+
+
+def _compact_column(col, rtol=0.0):
+    """
+    Smallest storage of a float column: an integer type if all values are
+    whole numbers, _Categorical for few distinct values, float32 if it
+    round-trips (exactly, or within `rtol` relative error), else float64.
+    """
+    col = np.asarray(col, dtype=float)
+    if len(col) and np.isfinite(col).all() and (col == np.trunc(col)).all():
+        lo, hi = col.min(), col.max()
+        for dtype in (np.int8, np.int16, np.int32, np.int64):
+            info = np.iinfo(dtype)
+            if info.min <= lo and hi <= info.max:
+                return col.astype(dtype)
+
+    if (len(col) >= _CATEGORICAL_MIN_ROWS
+            and len(np.unique(col[:_CATEGORICAL_SAMPLE])) <= _CATEGORICAL_MAX):
+        categories, codes = np.unique(col, return_inverse=True)
+        if len(categories) <= _CATEGORICAL_MAX:
+            return _Categorical(codes.astype(np.uint8), categories)
+
+    single = col.astype(np.float32)
+    back = single.astype(float)
+    if np.array_equal(back, col, equal_nan=True):
+        return single
+    if rtol > 0:
+        with np.errstate(invalid="ignore"):
+            close = (np.abs(back - col) <= rtol * np.abs(col)) | (np.isnan(col) & np.isnan(back))
+        if close.all():
+            return single
+    return np.ascontiguousarray(col)
+
 
 class DataFile:
-    def __init__(self, path, headers, data):
+    def __init__(self, path, headers, data, source_end=None, profile=None, diagnostics=None):
         self.path = path
         self.headers = headers
         self.data = data
+        # Helpers.FormatProfile the file was parsed with (None: sniffed when needed)
+        self.profile = profile
+        # LoadDiagnostics of the parse (None when loaded from the cache)
+        self.diagnostics = diagnostics
+        # Bytes of the source file `data` was parsed from (follow mode resumes there)
+        self.source_end = source_end
+        self._follow = None
+        self._pyramids = {}     # column name -> MinMaxPyramid
+        self._sorted = {}       # column name -> (rows checked, non-decreasing?)
+
+    @property
+    def headers(self):
+        return self._headers
+
+    @headers.setter
+    def headers(self, value):
+        self._headers = value
+        # Column name -> index; a repeated name means its first column (like list.index)
+        self._index = {}
+        for j, name in enumerate(value):
+            self._index.setdefault(name, j)
+
+    def column_index(self, name):
+        try:
+            return self._index[name]
+        except KeyError:
+            raise ValueError(f"{name!r} is not a column of {os.path.basename(self.path)}") from None
+
+    @property
+    def data(self):
+        """
+        Float matrix of all the columns, column-major: every column is
+        contiguous. For a compacted file it is rebuilt from the typed columns
+        (float64 copy): use get_column() instead.
+        """
+        if self._typed is not None:
+            return np.array([self._typed_column(j) for j in range(len(self._typed))], dtype=float).T
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = _column_major(value)
+        self._typed = None    # compact() storage, one array per column
+
+    @property
+    def is_mapped(self):
+        """True when data is a memory-mapped view of a cache entry (see DataCache)."""
+        return isinstance(self._data, np.memmap)
+
+    @property
+    def is_compact(self):
+        return self._typed is not None
+
+    @property
+    def nbytes(self):
+        """RAM used by the values (0 for a memory-mapped cache entry)."""
+        if self._typed is not None:
+            return sum(c.nbytes for c in self._typed)
+        return 0 if self.is_mapped else self._data.nbytes
 
     def get_column(self, name):
-        idx = self.headers.index(name)
-        return self.data[:, idx]
+        """
+        Values of a column: a contiguous array, a view of the storage (a
+        decoded copy for a compacted column of few distinct values, shared
+        while in use).
+        """
+        idx = self.column_index(name)
+        if self._typed is not None:
+            return self._typed_column(idx)
+        return self._data[:, idx]
+
+    def _typed_column(self, j):
+        col = self._typed[j]
+        return col.decode() if isinstance(col, _Categorical) else col
+
+    def compact(self, rtol=0.0):
+        """
+        Memory-saving mode: store every column in the smallest type that
+        holds it losslessly (integer, codes of a few distinct values,
+        float32), or float32 if it stays within relative tolerance `rtol`.
+        get_column() then returns the typed column (integers as ints).
+        Memory-mapped and followed files are left alone. Returns the bytes saved.
+        """
+        if self._typed is not None or self.is_mapped or self.is_followed:
+            return 0
+        before = self._data.nbytes
+        columns = [_compact_column(self._data[:, j], rtol) for j in range(self._data.shape[1])]
+        self._data = None
+        self._typed = columns
+        return before - self.nbytes
+
+    def copy(self):
+        """Independent in-RAM float64 DataFile with the same rows (not followed)."""
+        if self._typed is not None:
+            data = self.data    # already a new matrix
+        else:
+            data = np.array(self._data, dtype=float, order="F")
+        return DataFile(self.path, list(self.headers), data, self.source_end,
+                        self.profile, copy.deepcopy(self.diagnostics))
+
+    def pyramid(self, name):
+        """
+        Min/max pyramid of a column, used to decimate huge curves (see
+        Decimation.MinMaxPyramid). Built on first use and kept here; rows
+        appended in follow mode only update its tail.
+        """
+        pyr = self._pyramids.get(name)
+        if pyr is None:
+            pyr = self._pyramids[name] = MinMaxPyramid()
+        pyr.update(self.get_column(name))
+        return pyr
+
+    def column_is_sorted(self, name):
+        """True when the column is non-decreasing (checked once, then only new rows)."""
+        col = self.get_column(name)
+        n, ok = self._sorted.get(name, (0, True))
+        if len(col) < n:
+            n, ok = 0, True
+        if ok and len(col) > n:
+            ok = is_sorted(col[max(n - 1, 0):])
+        self._sorted[name] = (len(col), ok)
+        return ok
+
+    # ------------------------------------------------------------------
+    # Follow (tail) mode
+    # ------------------------------------------------------------------
+    @property
+    def is_followed(self):
+        return self._follow is not None
+
+    def follow(self):
+        """
+        Start following the source file: read_appended() then parses only
+        the bytes appended since the last call. The data moves to a growable
+        in-RAM buffer (a memory-mapped cache entry stops being used).
+        """
+        if self._follow is not None:
+            return
+        with open(self.path, "rb") as f:
+            profile = self.profile or _sniff(f)
+            delimiter, _, _ = _scan_head(_iter_file_lines(f), profile)
+            end = self.source_end
+            if end is None:
+                end = os.fstat(f.fileno()).st_size
+            # An unterminated last line may still be being written: forget
+            # the row it gave and parse it again once complete.
+            f.seek(max(end - _TAIL_PEEK_BYTES, 0))
+            tail = f.read(end - f.tell())
+        cut = max(tail.rfind(b"\n"), tail.rfind(b"\r")) + 1
+        partial = tail[cut:] if cut or len(tail) < _TAIL_PEEK_BYTES else b""
+
+        buf = _RowBuffer.adopt(self.data)     # a compacted file goes back to float64
+        if partial:
+            buf.n -= len(_parse_block(_decode_block(partial), delimiter, len(self.headers), profile))
+        self.profile = profile
+        self._follow = _FollowState(delimiter, end - len(partial), buf)
+        self.data = buf.view()
+
+    def unfollow(self):
+        self._follow = None
+
+    def read_appended(self) -> int:
+        """
+        Follow mode: parse the complete lines appended to the source since the
+        last call and extend data (amortized O(1) per row).
+        Returns the number of new rows. A file that shrank (truncated or
+        rewritten) is reloaded as a whole and all its rows count as new.
+        """
+        fl = self._follow
+        if fl is None:
+            raise RuntimeError("read_appended() needs follow() first")
+
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == fl.offset:
+                return 0
+            if size < fl.offset:
+                return self._reload()
+            f.seek(fl.offset)
+            raw = f.read(size - fl.offset)
+
+        cut = max(raw.rfind(b"\n"), raw.rfind(b"\r")) + 1
+        if cut == 0:
+            return 0    # no complete line yet
+        rows = _parse_block(_decode_block(raw[:cut]), fl.delimiter, fl.buffer.ncols,
+                            self.profile, self.diagnostics)
+        if self.diagnostics is not None:
+            self.diagnostics.rows += len(rows)
+        fl.offset += cut
+        if len(rows):
+            fl.buffer.append(rows)
+            self.data = fl.buffer.view()
+        return len(rows)
+
+    def _reload(self):
+        new = load_data_file(self.path)
+        self.headers = new.headers
+        self.data = new.data
+        self.source_end = new.source_end
+        self.profile = new.profile
+        self.diagnostics = new.diagnostics
+        self._follow = None
+        self._pyramids.clear()
+        self._sorted.clear()
+        self.follow()
+        return len(self.data)
+
+
+class _FollowState:
+    def __init__(self, delimiter, offset, buffer):
+        self.delimiter = delimiter
+        self.offset = offset    # start of the first byte not parsed yet
+        self.buffer = buffer
 
 
 def _is_pure_numeric_row(line: str, delimiter) -> bool:
@@ -29,47 +426,406 @@ def _is_pure_numeric_row(line: str, delimiter) -> bool:
     return True
 
 
-def load_data_file(path: str) -> DataFile:
-    ext = os.path.splitext(path)[1].lower()
+def _iter_file_lines(f):
+    """Yield (byte_offset, line) for a file opened in binary mode."""
+    pos = f.tell()
+    for raw in f:
+        parts = _cr_split_re.split(raw) if b"\r" in raw else (raw,)
+        for part in parts:
+            yield pos, part.decode("utf-8", errors="ignore").replace("\ufeff", "")
+            pos += len(part)
 
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-        raw_lines = f.readlines()
 
-    # Clean lines: strip BOM, remove empties
-    lines = []
-    for l in raw_lines:
-        l = l.replace("\ufeff", "").rstrip("\n").strip()
-        if l:
-            lines.append(l)
+def _block_ranges(f, start, size):
+    """Cut bytes [start, size) of a binary file into ~_BLOCK_BYTES ranges ending on a line break."""
+    ranges = []
+    while start < size:
+        f.seek(min(start + _BLOCK_BYTES, size))
+        f.readline()
+        end = f.tell()
+        ranges.append((start, end))
+        start = end
+    return ranges
 
-    if not lines:
-        raise ValueError("No data found in file")
 
-    # Remove comment-only lines
-    comment_prefixes = ("#", "%", "//")
-    filtered = [l for l in lines if not l.lstrip().startswith(comment_prefixes)]
-    if not filtered:
-        raise ValueError("No data found in file (only comments)")
+def _iter_body_blocks(f, start):
+    """
+    Stream a binary file from `start` in ~_BLOCK_BYTES reads.
+    Yields raw byte blocks that end on a line break; the partial last line of
+    each read is carried over to the next one.
+    """
+    f.seek(start)
+    carry = b""
+    while True:
+        chunk = f.read(_BLOCK_BYTES)
+        if not chunk:
+            break
+        if carry:
+            chunk = carry + chunk
+        cut = chunk.rfind(b"\n") + 1
+        if cut == 0:
+            carry = chunk
+            continue
+        carry = chunk[cut:]
+        yield chunk[:cut]
+    if carry:
+        yield carry
+
+
+def _decode_block(raw: bytes) -> str:
+    """Decode one body block (BOM stripped, newlines normalized to '\\n')."""
+    text = raw.decode("utf-8", errors="ignore")
+    if "\ufeff" in text:
+        text = text.replace("\ufeff", "")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _read_block(f, start, end) -> str:
+    """Read and decode one byte range."""
+    f.seek(start)
+    return _decode_block(f.read(end - start))
+
+
+def _column_major(data):
+    """`data` with contiguous columns (Fortran order); copied only when it is not."""
+    if data is None or data.ndim != 2 or len(data) < 2 or data.strides[0] == data.itemsize:
+        return data
+    return np.asfortranarray(data)
+
+
+class _RowBuffer:
+    """
+    Preallocated float matrix that parsed blocks are appended to.
+    Grows geometrically when a size estimate falls short and is trimmed in
+    place at the end, so loading never holds the blocks and their
+    concatenation at the same time.
+
+    The matrix is column-major (every column contiguous, spare capacity at
+    the end of each column): plotting and decimation read whole columns.
+    """
+    def __init__(self, ncols, capacity=1024):
+        self.ncols = ncols
+        self.n = 0
+        self._buf = np.empty((max(capacity, 1), ncols), dtype=float, order="F")
+        # Once views of the buffer are out, growing must copy instead of realloc
+        self._shared = False
+
+    @classmethod
+    def adopt(cls, data):
+        """Buffer whose first rows are `data` (not copied until it has to grow)."""
+        if isinstance(data, np.memmap) or not data.flags.writeable:
+            data = np.array(data, dtype=float, order="F")
+        buf = cls.__new__(cls)
+        buf.ncols = data.shape[1]
+        buf.n = len(data)
+        buf._buf = _column_major(data)
+        buf._shared = True
+        return buf
+
+    @property
+    def capacity(self):
+        return len(self._buf)
+
+    def reserve(self, rows):
+        """Make room for at least `rows` rows in total."""
+        if rows <= len(self._buf):
+            return
+        if self._shared or len(self._buf) < 2:   # a 1-row matrix has no column order to keep
+            buf = np.empty((rows, self.ncols), dtype=float, order="F")
+            buf[:self.n] = self._buf[:self.n]
+            self._buf = buf
+            self._shared = False
+        else:
+            self._realloc(rows)
+
+    def append(self, rows):
+        need = self.n + len(rows)
+        if need > len(self._buf):
+            self.reserve(max(need, int(len(self._buf) * 1.5)))
+        self._buf[self.n:need] = rows
+        self.n = need
+
+    def view(self) -> np.ndarray:
+        """The filled rows, keeping the spare capacity for later appends."""
+        self._shared = True
+        return self._buf[:self.n]
 
-    # Detect delimiter from first non-comment line (simple + predictable)
-    delimiter = detect_delimiter(filtered[0])
+    def result(self) -> np.ndarray:
+        """The filled rows; the spare capacity is released."""
+        if self._shared:
+            return self._buf[:self.n]
+        if self.n != len(self._buf):
+            self._realloc(self.n)
+        return self._buf
+
+    def _realloc(self, rows):
+        """
+        Resize the (owned) buffer to `rows` rows in place. resize() keeps the
+        flat memory, where column j starts at j * capacity: the columns are
+        moved to their new starts (last first when growing, first first when
+        shrinking, so that none is overwritten before it moved).
+        """
+        old, n = len(self._buf), self.n
+        if rows > old:
+            self._buf.resize((rows, self.ncols), refcheck=False)
+        flat = self._buf.reshape(-1, order="F")
+        order = range(self.ncols - 1, 0, -1) if rows > old else range(1, self.ncols)
+        for j in order:
+            flat[j * rows:j * rows + n] = flat[j * old:j * old + n]
+        if rows < old:
+            self._buf.resize((rows, self.ncols), refcheck=False)
+
+
+def _quoted_field_re(delimiter):
+    """Regex matching a whole field wrapped in matching quotes (cached per delimiter)."""
+    rx = _quoted_field_res.get(delimiter)
+    if rx is None:
+        if delimiter is None:
+            rx = re.compile(r"""(^|[ \t])()(["'])([^"'\s]*)\3(?=[ \t]|$)""", re.M)
+        else:
+            d = re.escape(delimiter)
+            rx = re.compile(rf"""(^|{d})([ \t]*)(["'])([^"'\n{d}]*)\3(?=[ \t]*(?:{d}|$))""", re.M)
+        _quoted_field_res[delimiter] = rx
+    return rx
+
+
+def _misgrouped(raw: bytes, thousands, decimal) -> bool:
+    """
+    True if a `thousands` separator of the block does not group integer
+    digits by three: Helpers.bad_group_re, vectorized over the whole block.
+    """
+    buf = np.frombuffer(raw, dtype=np.uint8)
+    pos = np.flatnonzero(buf == ord(thousands)) + 5
+    padded = np.zeros(len(buf) + 10, dtype=np.uint8)   # no digit past either end
+    padded[5:-5] = buf
+
+    def digit(k):
+        c = padded[pos + k]
+        return (c >= 48) & (c <= 57)
+
+    # Exactly three digits after
+    if not (digit(1) & digit(2) & digit(3) & ~digit(4)).all():
+        return True
+    # One to three digits before, not following the decimal mark
+    d1, d2, d3 = digit(-1), digit(-2), digit(-3)
+    if not d1.all() or (d2 & d3 & digit(-4)).any():
+        return True
+    run = 1 + d2 + (d2 & d3)
+    return bool((padded[pos - run - 1] == ord(decimal)).any())
+
+
+_COMMA_TO_DOT = bytes.maketrans(b",", b".")
+
+
+def _normalize_block(text: str, delimiter, profile=None):
+    """
+    Rewrite a block of numeric text so numpy's C parser reads it exactly like
+    the strict parser would (quotes, thousands separators, decimal comma).
+    With a known number convention (profile.decimal "." or ",") the block is
+    rewritten for it; returns None when a field does not follow it (e.g. a
+    "." in a decimal-comma file without "." thousands), so the strict parser
+    can report it. Otherwise, returns None when fields mix ',' and '.' and
+    need a per-field decision.
+    """
+    if '"' in text or "'" in text:
+        text = _quoted_field_re(delimiter).sub(r"\1\2\4", text)
+    try:
+        raw = text.encode("ascii")
+    except UnicodeEncodeError:
+        return None
+    if delimiter is not None and b" " in raw:
+        raw = raw.replace(b" ", b"")
+
+    # Separators out and decimal commas to dots, in one translate() pass
+    table, delete = None, b""
+    decimal = profile.decimal if profile is not None else None
+    if decimal in (".", ","):
+        thousands = profile.thousands
+        if thousands is not None and thousands.encode() in raw:
+            if _misgrouped(raw, thousands, decimal):
+                return None
+            delete = thousands.encode()
+        other = "," if decimal == "." else "."
+        if other not in (delimiter, thousands) and other.encode() in raw:
+            return None
+        if decimal == ",":
+            table = _COMMA_TO_DOT
+    elif delimiter != "," and b"," in raw:
+        if b"." in raw:
+            return None
+        table = _COMMA_TO_DOT
+    if table is not None or delete:
+        raw = raw.translate(table, delete)
+
+    # Anything but digits, signs, dots, exponents, whitespace and the delimiter
+    # (comments, stray quotes, text footers, nan/inf...) needs the strict parser.
+    if raw.translate(None, _NUMERIC_BYTES + (delimiter or "").encode()):
+        return None
+    return raw.decode("ascii")
+
+
+def _parse_rows(lines, delimiter, ncols, profile=None, diag=None):
+    """
+    Slow, strict row-by-row parse (the reference semantics). Numbers are
+    read with the profile's convention (see Helpers.float_parser); dropped
+    rows are reported to `diag` (LoadDiagnostics) if given.
+    """
+    convert = profile.float_parser() if profile is not None else parse_float
+    data_rows = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith(_COMMENT_PREFIXES):
+            continue
+
+        parts = split_line(line, delimiter)
+        if len(parts) != ncols:
+            # If column count changes, skip this row
+            if diag is not None:
+                diag.skip(line, "columns")
+            continue
 
-    # Find first purely numeric row
+        row = [convert(p) for p in parts]
+        if None in row:
+            # Not purely numeric (footer junk, text...) => skip
+            if diag is not None:
+                other = convert is not parse_float and any(
+                    v is None and parse_float(p) is not None for p, v in zip(parts, row))
+                diag.skip(line, "convention" if other else "not numeric")
+            continue
+        data_rows.append(row)
+
+    if not data_rows:
+        return np.empty((0, ncols), dtype=float)
+    return np.array(data_rows, dtype=float)
+
+
+def _parse_fast(text: str, delimiter, ncols, profile=None):
+    """
+    Fast path of _parse_block(): the whole block through np.loadtxt's C
+    tokenizer, None unless every row is a clean numeric row.
+    """
+    fast = _normalize_block(text, delimiter, profile)
+    if fast is None:
+        return None
+    if not fast.strip():
+        return np.empty((0, ncols), dtype=float)
+    try:
+        data = np.loadtxt(io.StringIO(fast), delimiter=delimiter, dtype=float,
+                          ndmin=2, comments=None)
+    except ValueError:
+        return None
+    return data if data.shape[1] == ncols else None
+
+
+def _parse_block(text: str, delimiter, ncols, profile=None, diag=None) -> np.ndarray:
+    """
+    Parse one block of the numeric body.
+    Fast path: one vectorized pass through np.loadtxt's C tokenizer.
+    A block it cannot take as-is is split in two and retried; small rejected
+    blocks fall back to the strict row-by-row parser, so skipped rows
+    (wrong column count, non-numeric footer) stay identical.
+    Rows the strict parser drops are reported to `diag` (LoadDiagnostics).
+    """
+    data = _parse_fast(text, delimiter, ncols, profile)
+    if data is not None:
+        return data
+
+    if len(text) > _MIN_BLOCK_CHARS:
+        mid = text.find("\n", len(text) // 2)
+        if 0 <= mid < len(text) - 1:
+            return np.concatenate((
+                _parse_block(text[:mid + 1], delimiter, ncols, profile, diag),
+                _parse_block(text[mid + 1:], delimiter, ncols, profile, diag),
+            ))
+
+    return _parse_rows(text.splitlines(), delimiter, ncols, profile, diag)
+
+
+def _sample_lines(f):
+    """
+    Content lines (no blanks, no comments) of a binary file for sniff_format():
+    (head, body) with the first lines and a few lines from across the body.
+    Leaves the file at offset 0.
+    """
+    f.seek(0)
+    head = []
+    for _, l in _iter_file_lines(f):
+        l = l.strip()
+        if l and not l.startswith(_COMMENT_PREFIXES):
+            head.append(l)
+            if len(head) >= _SNIFF_HEAD_LINES:
+                break
+    head_end = f.tell()
+
+    body = []
+    size = os.fstat(f.fileno()).st_size
+    span = size - head_end
+    if span > 2 * _SNIFF_SAMPLE_BYTES:
+        for k in range(_SNIFF_BODY_SAMPLES):
+            f.seek(head_end + span * k // _SNIFF_BODY_SAMPLES)
+            lines = _decode_block(f.read(_SNIFF_SAMPLE_BYTES)).split("\n")
+            # The first and last lines are cut by the read
+            for l in lines[1:-1]:
+                l = l.strip()
+                if l and not l.startswith(_COMMENT_PREFIXES):
+                    body.append(l)
+    f.seek(0)
+    return head, body
+
+
+def _sniff(f):
+    """FormatProfile of a binary file from a bounded sample (None if nothing looks numeric)."""
+    return sniff_format(*_sample_lines(f))
+
+
+def _scan_head(lines, profile=None):
+    """
+    Walk the head of a file until its first purely numeric row.
+    `lines` yields (offset, line); only the lines up to the data are consumed.
+    Skips empties and comment-only lines and builds the headers from the
+    last preamble line. The delimiter comes from the sniffed `profile`, whose
+    column count also tells numeric preamble lines from the data; without
+    a profile it is detected from the first non-comment line.
+    Returns (delimiter, headers, data_start) where data_start is the offset
+    of the first numeric row.
+    """
+    has_content = False
+    delimiter = profile.delimiter if profile is not None else None
+    preamble = []
     data_start = None
-    for i, line in enumerate(filtered):
-        if _is_pure_numeric_row(line, delimiter):
-            data_start = i
+    first_row = None
+    for start, l in lines:
+        l = l.strip()
+        if not l:
+            continue
+        has_content = True
+        if l.startswith(_COMMENT_PREFIXES):
+            continue
+        if not preamble and profile is None:
+            delimiter = detect_delimiter(l)
+        if _is_pure_numeric_row(l, delimiter) and (
+                profile is None or len(split_line(l, delimiter)) == profile.ncols):
+            data_start = start
+            first_row = l
             break
+        preamble.append(l)
 
+    if not has_content:
+        raise ValueError("No data found in file")
+    if data_start is None and not preamble:
+        raise ValueError("No data found in file (only comments)")
     if data_start is None:
         raise ValueError("No purely numeric data row detected")
 
-    # Preamble (text) lines above numeric data
-    preamble = filtered[:data_start]
-    header_line = preamble[-1] if preamble else None
+    # Preamble (text) lines above numeric data; numeric lines left there
+    # for not having ncols fields (stray values) do not name the columns
+    text_lines = [l for l in preamble if profile is None or not _is_pure_numeric_row(l, delimiter)]
+    header_line = text_lines[-1] if text_lines else None
 
     # Determine number of columns from first numeric row
-    first_parts = split_line(filtered[data_start], delimiter)
+    first_parts = split_line(first_row, delimiter)
     ncols = len(first_parts)
 
     # Build headers:
@@ -84,26 +840,394 @@ def load_data_file(path: str) -> DataFile:
     else:
         headers = [f"col_{i}" for i in range(ncols)]
 
-    # Parse numeric rows (only rows that are purely numeric)
-    data_rows = []
-    for line in filtered[data_start:]:
-        if not _is_pure_numeric_row(line, delimiter):
-            # Stop if you want strict “numeric block only”, or just skip footer junk.
-            # Your requirement didn't mention footers; safest is "skip".
-            continue
+    return delimiter, headers, data_start
 
-        parts = split_line(line, delimiter)
-        if len(parts) != ncols:
-            # If column count changes, skip this row
-            continue
 
-        row = [parse_float(p) for p in parts]
-        # parse_float is guaranteed non-None here, but keep safe:
-        row = [np.nan if v is None else v for v in row]
-        data_rows.append(row)
+def _parse_range(path, start, end, delimiter, ncols, profile=None):
+    """Process-pool entry point: parse one byte range of the numeric body -> (rows, LoadDiagnostics)."""
+    diag = LoadDiagnostics()
+    with open(path, "rb") as f:
+        return _parse_block(_read_block(f, start, end), delimiter, ncols, profile, diag), diag
 
-    if not data_rows:
+
+_pool = None
+_pool_workers = 0
+_pool_users = {}    # pool -> loads using it (see _release_process_pool)
+_pool_lock = threading.Lock()
+
+def _acquire_process_pool(workers):
+    """
+    Shared process pool, so files loading side by side spread over the same
+    cores. Every acquire needs a _release_process_pool(): a pool replaced by
+    a larger one keeps running until the loads using it are done.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers < workers:
+            old = _pool
+            # "spawn": forking a process that already runs Qt threads is unsafe
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+            if old is not None and old not in _pool_users:
+                old.shutdown(wait=False)
+        _pool_users[_pool] = _pool_users.get(_pool, 0) + 1
+        return _pool
+
+
+def _release_process_pool(pool):
+    with _pool_lock:
+        _pool_users[pool] -= 1
+        if _pool_users[pool]:
+            return
+        del _pool_users[pool]
+        retired = pool is not _pool
+    if retired:
+        pool.shutdown(wait=False)
+
+
+def _reset_process_pool():
+    """Forget a broken pool (shut down by its last user)."""
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+def _parse_ranges_parallel(path, ranges, delimiter, ncols, profile, workers, progress, cancel, out, diag):
+    """
+    Parse byte ranges on the process pool, appending the blocks to `out` in
+    file order (and their diagnostics to `diag`). At most 2 * workers ranges
+    are in flight, so finished blocks waiting for an earlier one never pile up.
+    """
+    pool = _acquire_process_pool(workers)
+    todo = iter(enumerate(ranges))
+    futures = {}    # in flight -> range index
+    ready = {}      # parsed, waiting for an earlier range
+    next_i = 0
+
+    def submit():
+        item = next(todo, None)
+        if item is not None:
+            i, (start, end) = item
+            futures[pool.submit(_parse_range, path, start, end, delimiter, ncols, profile)] = i
+
+    try:
+        for _ in range(2 * workers):
+            submit()
+        while futures:
+            if cancel is not None and cancel.is_set():
+                raise LoadCancelled(path)
+            done, _ = wait(futures, timeout=0.1, return_when=FIRST_COMPLETED)
+            for fut in done:
+                ready[futures.pop(fut)] = fut.result()
+            while next_i in ready:
+                rows, block_diag = ready.pop(next_i)
+                out.append(rows)
+                diag.merge(block_diag)
+                if next_i == 0:
+                    # Ranges have about the same size: reserve for all of them
+                    out.reserve(int(out.n * len(ranges) * 1.02) + 16)
+                next_i += 1
+                submit()
+            if done and progress is not None:
+                progress(next_i / len(ranges))
+    finally:
+        for fut in futures:
+            fut.cancel()
+        _release_process_pool(pool)
+
+
+def load_data_file(path: str, progress=None, cancel=None, workers=None) -> DataFile:
+    """
+    Parse a delimited text file into a DataFile.
+    The file is streamed in blocks (header scan, then the numeric body) and
+    rows go straight into a preallocated matrix, sized from the first block.
+    progress: optional callable(fraction in [0, 1]) called as the body is parsed.
+    cancel: optional threading.Event; once set, loading stops with LoadCancelled.
+    workers: with more than one worker, large bodies are cut on line
+        boundaries and parsed on a shared process pool.
+    """
+    ext = os.path.splitext(path)[1].lower()
+
+    with open(path, "rb") as f:
+        profile = _sniff(f)
+        delimiter, headers, data_start = _scan_head(_iter_file_lines(f), profile)
+        ncols = len(headers)
+
+        size = os.fstat(f.fileno()).st_size
+        body_bytes = max(size - data_start, 1)
+        out = _RowBuffer(ncols)
+        diag = LoadDiagnostics(profile)
+
+        parsed = False
+        if workers and workers > 1 and body_bytes >= _PARALLEL_MIN_BLOCKS * _BLOCK_BYTES:
+            ranges = _block_ranges(f, data_start, size)
+            if len(ranges) >= _PARALLEL_MIN_BLOCKS:
+                try:
+                    _parse_ranges_parallel(path, ranges, delimiter, ncols, profile,
+                                           workers, progress, cancel, out, diag)
+                    parsed = True
+                    end = ranges[-1][1]
+                except (BrokenProcessPool, RuntimeError) as e:
+                    # Fall back to parsing in this process (RuntimeError: the
+                    # pool was shut down, e.g. while the interpreter exits)
+                    if isinstance(e, BrokenProcessPool):
+                        _reset_process_pool()
+                    out = _RowBuffer(ncols)
+                    diag = LoadDiagnostics(profile)
+
+        if not parsed:
+            done = 0
+            for raw in _iter_body_blocks(f, data_start):
+                if cancel is not None and cancel.is_set():
+                    raise LoadCancelled(path)
+                rows = _parse_block(_decode_block(raw), delimiter, ncols, profile, diag)
+                done += len(raw)
+                if out.n == 0 and len(rows) and done < body_bytes:
+                    # Size the matrix for the whole body from the first block
+                    out.reserve(int(len(rows) * body_bytes / done * 1.02) + 16)
+                out.append(rows)
+                if progress is not None:
+                    progress(min(done / body_bytes, 1.0))
+            end = data_start + done
+
+    data = out.result()
+
+    if len(data) == 0:
         raise ValueError("Failed to parse numeric data (no valid numeric rows)")
 
-    data = np.array(data_rows, dtype=float)
-    return DataFile(path, headers, data)
+    diag.rows = len(data)
+    return DataFile(path, headers, data, source_end=end, profile=profile, diagnostics=diag)
+
+
+# =========================
+# Lazy, per-column loading
+# =========================
+
+_ws_run_re = re.compile(r"[ \t]+")
+_ws_edge_re = re.compile(r"^ | $", re.M)
+_blank_lines_re = re.compile(r"\n\n+")
+
+
+def _field_ends(fast: str, delimiter, ncols):
+    """
+    (bytes, end offsets of every field) of a normalized block (see
+    _normalize_block), None when a row has not exactly ncols fields.
+    """
+    if delimiter is None:
+        fast = _ws_edge_re.sub("", _ws_run_re.sub(" ", fast))
+        sep = " "
+    else:
+        if delimiter != "\t" and "\t" in fast:
+            return None
+        sep = delimiter
+    fast = _blank_lines_re.sub("\n", fast).lstrip("\n")
+    if fast and not fast.endswith("\n"):
+        fast += "\n"
+
+    buf = np.frombuffer(fast.encode("ascii"), dtype=np.uint8)
+    seps = np.flatnonzero((buf == ord(sep)) | (buf == 10))
+    if len(seps) % ncols:
+        return None
+    kinds = buf[seps].reshape(-1, ncols)
+    if not (kinds[:, -1] == 10).all() or not (kinds[:, :-1] == ord(sep)).all():
+        return None
+    return buf, seps
+
+
+def _convert_fields(buf, starts, ends):
+    """Floats of the byte spans [start, end), None if one is empty or not a number."""
+    lengths = ends - starts
+    if not len(lengths):
+        return np.empty(0, dtype=float)
+    if lengths.min() == 0:
+        return None
+
+    # Gather the fields into a zero-padded fixed-width byte matrix and let
+    # numpy convert it as an S<width> array in one C loop.
+    width = int(lengths.max())
+    offsets = np.arange(width)
+    mask = offsets < lengths[:, None]
+    fields = np.zeros((len(starts), width), dtype=np.uint8)
+    fields[mask] = buf[(starts[:, None] + offsets)[mask]]
+    try:
+        return fields.view(f"S{width}").ravel().astype(float)
+    except ValueError:
+        return None
+
+
+def _extract_column(fast: str, delimiter, ncols, j):
+    """
+    Convert only field `j` of every row of a normalized block (see
+    _normalize_block), without tokenizing the other fields into floats.
+    Returns None when field j of a row cannot be converted. The other fields
+    are not checked: only use it on blocks _parse_fast() accepted.
+    """
+    split = _field_ends(fast, delimiter, ncols)
+    if split is None:
+        return None
+    buf, seps = split
+    if not len(seps):
+        return np.empty(0, dtype=float)
+
+    # Byte span [start, end) of field j in every row
+    ends = seps[j::ncols]
+    if j > 0:
+        starts = seps[j - 1::ncols] + 1
+    else:
+        starts = np.concatenate(([0], seps[ncols - 1:-1:ncols] + 1))
+    return _convert_fields(buf, starts, ends)
+
+
+class LazyDataFile(DataFile):
+    """
+    DataFile that only indexes the file when opened (header + byte ranges of
+    the numeric body) and parses a column the first time get_column() asks
+    for it. Parsed columns are kept in a small per-file LRU cache.
+
+    Rows are skipped with the same rules as load_data_file(). The first
+    column read checks every field of every block, so that which rows are
+    kept never depends on the column asked for. A block with rows to drop is
+    cut (like _parse_block does) into clean ranges, read with the fast path,
+    and the small ranges around the bad rows, parsed strictly on every read:
+    only these ranges are kept, never the parsed rows.
+    """
+    def __init__(self, path, headers, delimiter, blocks, max_cached_columns=16, profile=None):
+        self.path = path
+        self.headers = headers
+        self.delimiter = delimiter
+        self.profile = profile
+        self.diagnostics = None         # rows are only checked when parsed
+        self.max_cached_columns = max_cached_columns
+        self._blocks = blocks           # [(start, end)] byte ranges of the body
+        self._clean = set()             # blocks whose fields were all checked numeric
+        self._ranges = {}               # other checked blocks -> [(start, end, clean)] (see _split_block)
+        self._columns = OrderedDict()   # column index -> parsed column (LRU)
+        self._pyramids = {}
+        self._sorted = {}
+
+    @property
+    def data(self):
+        """Full matrix. Parses every column: only for export / caching."""
+        return np.array([self._column(j) for j in range(len(self.headers))], dtype=float).T
+
+    source_end = None
+    _follow = None
+
+    @property
+    def is_mapped(self):
+        return False
+
+    is_compact = False
+
+    @property
+    def nbytes(self):
+        return sum(c.nbytes for c in self._columns.values())
+
+    def compact(self, rtol=0.0):
+        return 0    # only the columns in use are in RAM already
+
+    def follow(self):
+        raise TypeError("A lazily loaded file cannot be followed; load it with load_data_file()")
+
+    def get_column(self, name):
+        return self._column(self.column_index(name))
+
+    def _clean_column(self, text, j):
+        """Field j of a range whose fields were all checked numeric."""
+        fast = _normalize_block(text, self.delimiter, self.profile)
+        col = _extract_column(fast, self.delimiter, len(self.headers), j) if fast is not None else None
+        if col is None:
+            # (not expected: same text as checked) take the strict parser's rows
+            col = _parse_block(text, self.delimiter, len(self.headers), self.profile)[:, j]
+        return col
+
+    def _column(self, j):
+        col = self._columns.get(j)
+        if col is not None:
+            self._columns.move_to_end(j)
+            return col
+
+        ncols = len(self.headers)
+        pieces = []
+        with open(self.path, "rb") as f:
+            for b, (start, end) in enumerate(self._blocks):
+                text = _read_block(f, start, end)
+                ranges = self._ranges.get(b)
+                if ranges is None and b not in self._clean:
+                    # First read of this block: check all its fields
+                    ranges, values = _split_block(text, self.delimiter, ncols, self.profile, j)
+                    if len(ranges) == 1 and ranges[0][2]:
+                        self._clean.add(b)
+                    else:
+                        self._ranges[b] = ranges
+                    pieces += values
+                elif ranges is None:
+                    pieces.append(self._clean_column(text, j))
+                else:
+                    for lo, hi, clean in ranges:
+                        if clean:
+                            pieces.append(self._clean_column(text[lo:hi], j))
+                        else:
+                            pieces.append(_parse_rows(text[lo:hi].splitlines(), self.delimiter,
+                                                      ncols, self.profile)[:, j])
+
+        col = np.concatenate(pieces) if pieces else np.empty(0, dtype=float)
+        self._columns[j] = col
+        while len(self._columns) > self.max_cached_columns:
+            self._columns.popitem(last=False)
+        return col
+
+
+def _split_block(text: str, delimiter, ncols, profile, j):
+    """
+    Check every field of a block. Returns ([(start, end, clean)] character
+    ranges of text, [field j of each range]): clean ranges take the fast
+    path of _parse_block as a whole; a range that does not is cut in
+    _SPLIT_WAYS parts down to _MIN_BLOCK_CHARS, and the rest is parsed
+    strictly (the rows kept are the ones _parse_block keeps).
+    """
+    ranges, values = [], []
+
+    def check(lo, hi):
+        sub = text[lo:hi]
+        rows = _parse_fast(sub, delimiter, ncols, profile)
+        if rows is not None:
+            if ranges and ranges[-1][2] and ranges[-1][1] == lo:
+                ranges[-1] = (ranges[-1][0], hi, True)  # merge adjacent clean ranges
+            else:
+                ranges.append((lo, hi, True))
+            values.append(np.ascontiguousarray(rows[:, j]))
+            return
+        if hi - lo > _MIN_BLOCK_CHARS:
+            cuts = [lo]
+            for k in range(1, _SPLIT_WAYS):
+                nl = text.find("\n", max(lo + k * (hi - lo) // _SPLIT_WAYS, cuts[-1]), hi)
+                if nl < 0 or nl + 1 >= hi:
+                    break
+                if nl + 1 > cuts[-1]:
+                    cuts.append(nl + 1)
+            if len(cuts) > 1:
+                for a, b in zip(cuts, cuts[1:] + [hi]):
+                    check(a, b)
+                return
+        ranges.append((lo, hi, False))
+        values.append(_parse_rows(sub.splitlines(), delimiter, ncols, profile)[:, j])
+
+    check(0, len(text))
+    return ranges, values
+
+
+def load_data_file_lazy(path: str, max_cached_columns=16) -> LazyDataFile:
+    """
+    Open a data file without parsing it: headers are available immediately,
+    columns are parsed on first use (see LazyDataFile).
+    """
+    with open(path, "rb") as f:
+        profile = _sniff(f)
+        delimiter, headers, data_start = _scan_head(_iter_file_lines(f), profile)
+
+        # Cut the body into byte ranges on line boundaries
+        blocks = _block_ranges(f, data_start, os.fstat(f.fileno()).st_size)
+
+    return LazyDataFile(path, headers, delimiter, blocks, max_cached_columns, profile)
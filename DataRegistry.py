@@ -0,0 +1,102 @@
+"""
+DataRegistry.py
+
+Process-wide table of the DataFiles in use, so that a file opened again
+(re-added in the window, referenced by several projects, opened by several
+controllers) shares the DataFile, and its arrays, already in memory.
+
+Entries are keyed by the canonical path of the file, a fingerprint of its
+content (size + modification time, as DataCache) and the storage mode asked
+for (in RAM, memory-mapped, lazy, compacted): a file modified since it was
+opened is loaded again.
+
+The registry only holds weak references: Python's reference counting is the
+reference count. A DataFile stays registered while anything uses it
+(AppController.data_files, curves, lines on a canvas) and is released with
+its arrays when the last of them drops it.
+"""
+
+import os
+import threading
+import weakref
+
+from DataFile import LoadCancelled
+
+
+class DataRegistry:
+    def __init__(self):
+        self._files = weakref.WeakValueDictionary()     # key -> DataFile
+        self._loading = {}      # key -> threading.Event set once its load ended
+        self._lock = threading.Lock()
+
+        # Counters (see stats())
+        self.loads = 0      # files actually loaded
+        self.shared = 0     # opens served by a DataFile already in use
+
+    @staticmethod
+    def key(path, mode=()):
+        st = os.stat(path)
+        return (os.path.normcase(os.path.realpath(path)), st.st_size, st.st_mtime_ns, mode)
+
+    def open(self, path, load, mode=(), cancel=None):
+        """
+        The DataFile in use for this file and storage mode, or load(path) it.
+        Thread safe: a file requested while another thread loads it waits for
+        that load instead of parsing it twice.
+        cancel: optional threading.Event; stops waiting with LoadCancelled.
+        """
+        key = self.key(path, mode)
+        while True:
+            with self._lock:
+                df = self._files.get(key)
+                if df is not None:
+                    self.shared += 1
+                    return df
+                pending = self._loading.get(key)
+                owner = pending is None
+                if owner:
+                    pending = self._loading[key] = threading.Event()
+            if owner:
+                break
+            # Loaded (or failed / cancelled) by the other thread: look again
+            while not pending.wait(0.1):
+                if cancel is not None and cancel.is_set():
+                    raise LoadCancelled(path)
+
+        try:
+            df = load(path)
+            with self._lock:
+                self._files[key] = df
+                self.loads += 1
+            return df
+        finally:
+            with self._lock:
+                del self._loading[key]
+            pending.set()
+
+    def files(self):
+        """The DataFiles currently in use."""
+        with self._lock:
+            return list(self._files.values())
+
+    def nbytes(self):
+        """RAM used by the values of the registered files."""
+        return sum(df.nbytes for df in self.files())
+
+    def stats(self):
+        return {"open": len(self._files), "loads": self.loads, "shared": self.shared}
+
+    def reset_stats(self):
+        self.loads = self.shared = 0
+
+
+_default_registry = None
+_default_lock = threading.Lock()
+
+def default_registry() -> DataRegistry:
+    """Registry shared by every controller of the process."""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = DataRegistry()
+        return _default_registry
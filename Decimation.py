@@ -0,0 +1,376 @@
+"""
+Decimation.py
+
+Reduce a curve to the points its axes can actually show.
+
+A line drawn into a ~1500 px wide axes cannot show more than a few points per
+pixel column, yet Agg rasterizes every segment it is given. The decimators
+below cut the visible slice of a curve down to a size that depends on the
+axes width only:
+
+- "minmax": per pixel column, keep the first, last, lowest and highest point
+  (M4). The rasterized line is identical to the full-resolution one.
+- "lttb":   Largest-Triangle-Three-Buckets, ~one representative point per
+  pixel column; suited to marker plots where an envelope would pile markers.
+- "auto":   "minmax" for lines, "lttb" when the curve shows markers.
+- "none":   plot every point.
+
+Only curves whose x is sorted are decimated; anything else (scatter-like
+data, NaN in x) is drawn as is.
+
+Large columns get a MinMaxPyramid (built once, cached on the DataFile), so
+zooming and panning a huge curve only touches a few thousand points.
+"""
+
+import numpy as np
+
+DECIMATION_MODES = ("auto", "minmax", "lttb", "none")
+
+# Visible slices up to this many points per pixel column are drawn as is
+_MAX_POINTS_PER_PIXEL = 4
+
+# Curves with at least this many points are decimated through a MinMaxPyramid
+PYRAMID_MIN_POINTS = 1 << 20
+
+
+def resolve_mode(mode, marker=None):
+    """Concrete decimation mode ("minmax", "lttb" or "none") for a curve."""
+    if mode in (None, "auto"):
+        has_marker = marker not in (None, "", " ", "None", "none")
+        return "lttb" if has_marker else "minmax"
+    if mode not in DECIMATION_MODES:
+        raise ValueError(f"Unknown decimation mode: {mode!r}")
+    return mode
+
+
+def is_sorted(x) -> bool:
+    """True when x is non-decreasing (and free of NaN)."""
+    return len(x) < 2 or bool(np.all(x[1:] >= x[:-1]))
+
+
+def visible_range(x, xmin, xmax):
+    """
+    Index range [i0, i1) of sorted x covering [xmin, xmax], plus one point on
+    each side so the line still runs to the edges of the axes.
+    """
+    i0 = max(int(np.searchsorted(x, xmin, side="left")) - 1, 0)
+    i1 = min(int(np.searchsorted(x, xmax, side="right")) + 1, len(x))
+    return i0, max(i0, i1)
+
+
+def pixel_edges(xmin, xmax, width_px, transform=None):
+    """
+    x values of the boundaries between `width_px` pixel columns.
+    `transform` is the axis scale transform (e.g. ax.xaxis.get_transform())
+    so columns stay one pixel wide on log axes.
+    """
+    n = max(int(width_px), 1)
+    if transform is None:
+        return np.linspace(xmin, xmax, n + 1)[1:-1]
+    t0, t1 = transform.transform([xmin, xmax])
+    edges = np.linspace(t0, t1, n + 1)[1:-1]
+    return transform.inverted().transform(edges)
+
+
+def _segment_arg(y, starts, reduce):
+    """Index of the first min (reduce=np.fmin) / max (np.fmax) of each segment."""
+    vals = reduce.reduceat(y, starts)
+    counts = np.diff(np.append(starts, len(y)))
+    hits = np.flatnonzero(y == np.repeat(vals, counts))
+    seg = np.searchsorted(starts, hits, side="right") - 1
+    found, first = np.unique(seg, return_index=True)
+    out = starts.copy()         # all-NaN segments: keep their first point
+    out[found] = hits[first]
+    return out
+
+
+def minmax_indices(x, y, edges):
+    """
+    M4 reduction of sorted x: indices (sorted, unique) of the first, last,
+    min and max point of every pixel column delimited by `edges`.
+    """
+    n = len(x)
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+    starts = np.unique(np.concatenate(([0], np.searchsorted(x, edges))))
+    starts = starts[starts < n]
+    ends = np.append(starts[1:], n) - 1
+    idx = np.concatenate((
+        starts, ends,
+        _segment_arg(y, starts, np.fmin),
+        _segment_arg(y, starts, np.fmax),
+    ))
+    return np.unique(idx)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: indices of `n_out` points (first and last
+    included) that best keep the visual shape of the curve.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # Triangle areas overflow in small integer types (compacted columns)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    out = np.empty(n_out, dtype=np.intp)
+    out[0] = 0
+    out[-1] = n - 1
+    # n_out - 2 buckets over the inner points
+    bounds = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    a = 0
+    for k in range(n_out - 2):
+        lo, hi = bounds[k], bounds[k + 1]
+        # Average of the next bucket (the last point for the last bucket)
+        nlo, nhi = hi, bounds[k + 2] if k + 2 < len(bounds) else n
+        cx = x[nlo:nhi].mean()
+        cy = y[nlo:nhi].mean()
+        px, py = x[a], y[a]
+        area = np.abs((px - cx) * (y[lo:hi] - py) - (px - x[lo:hi]) * (cy - py))
+        a = lo + int(np.nanargmax(area)) if np.any(area == area) else lo
+        out[k + 1] = a
+    return out
+
+
+def _concat_ranges(lo, hi):
+    """Concatenation of arange(lo[i], hi[i]) for all i (empty ranges skipped)."""
+    lens = hi - lo
+    keep = lens > 0
+    lo, lens = lo[keep], lens[keep]
+    if not len(lo):
+        return np.empty(0, dtype=np.intp)
+    shift = lo - np.concatenate(([0], np.cumsum(lens)[:-1]))
+    return np.arange(lens.sum()) + np.repeat(shift, lens)
+
+
+def _nan_args(values, axis):
+    """(argmin, argmax) along axis, NaN never winning unless all are NaN."""
+    nan = np.isnan(values)
+    if nan.any():
+        return (np.where(nan, np.inf, values).argmin(axis),
+                np.where(nan, -np.inf, values).argmax(axis))
+    return values.argmin(axis), values.argmax(axis)
+
+
+class MinMaxPyramid:
+    """
+    Multi-resolution min/max index of one column.
+
+    Level k cuts the column into buckets of BASE * FACTOR**k points and stores
+    the index of the min and max point of each bucket. A pixel column of
+    the view is covered by the coarsest buckets that fit in it, finer ones
+    towards its edges and raw points at the very edges, so a query reads
+    O(pixels * levels) values whatever the zoom level.
+    Only indices are stored: values are read from the column itself.
+    """
+    BASE = 16
+    FACTOR = 4
+    _CHUNK = 1 << 20    # points per pass when building level 0
+
+    def __init__(self):
+        self.n = 0
+        self.levels = []    # [(argmin, argmax)], finest first
+
+    def update(self, y):
+        """
+        Build the pyramid for column y. When y only grew since the last call
+        (follow mode), just the buckets at its end are recomputed.
+        """
+        n = len(y)
+        if n < self.n:
+            self.n, self.levels = 0, []
+        if n == self.n:
+            return
+        dtype = np.int32 if n < 2 ** 31 else np.int64
+
+        # Level 0 from the points, from the first bucket that changed
+        b0 = self.n // self.BASE
+        pieces_min, pieces_max = [], []
+        for s in range(b0 * self.BASE, n, self._CHUNK):
+            e = min(s + self._CHUNK, n)
+            full = (e - s) // self.BASE * self.BASE
+            for lo, hi, size in ((s, s + full, self.BASE), (s + full, e, e - s - full)):
+                if hi > lo:
+                    amin, amax = _nan_args(np.asarray(y[lo:hi]).reshape(-1, size), 1)
+                    base = lo + np.arange(0, hi - lo, size)
+                    pieces_min.append((base + amin).astype(dtype))
+                    pieces_max.append((base + amax).astype(dtype))
+        levels = [self._splice(0, b0, pieces_min, pieces_max)]
+
+        # Coarser levels from the level below
+        b = b0
+        while len(levels[-1][0]) > 1:
+            k = len(levels)
+            b //= self.FACTOR
+            below_min, below_max = levels[-1]
+            lo = b * self.FACTOR
+            new_min = self._reduce(y, below_min[lo:], want_max=False)
+            new_max = self._reduce(y, below_max[lo:], want_max=True)
+            levels.append(self._splice(k, b, [new_min], [new_max]))
+        self.levels = levels
+        self.n = n
+
+    def _splice(self, k, keep, pieces_min, pieces_max):
+        """Level k: its first `keep` buckets (still valid) followed by the new ones."""
+        old = self.levels[k] if k < len(self.levels) else (np.empty(0, np.int32),) * 2
+        return (np.concatenate([old[0][:keep]] + pieces_min),
+                np.concatenate([old[1][:keep]] + pieces_max))
+
+    def _reduce(self, y, idx, want_max):
+        """Pick the min (or max) point of each group of FACTOR buckets."""
+        pad = -len(idx) % self.FACTOR
+        if pad:
+            idx = np.concatenate((idx, np.repeat(idx[-1:], pad)))
+        groups = idx.reshape(-1, self.FACTOR)
+        amin, amax = _nan_args(np.asarray(y[groups.ravel()]).reshape(groups.shape), 1)
+        pick = amax if want_max else amin
+        return groups[np.arange(len(groups)), pick]
+
+    def candidates(self, starts, ends):
+        """
+        Sorted indices containing the first, last, min and max point of every
+        segment [starts[j], ends[j]): M4 over these equals M4 over all points.
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        cov_lo = np.zeros_like(starts)  # part of each segment covered so far
+        cov_hi = np.zeros_like(starts)
+        covered = np.zeros(len(starts), dtype=bool)
+        out = [starts, ends - 1]
+
+        for k in range(len(self.levels) - 1, -1, -1):
+            size = self.BASE * self.FACTOR ** k
+            lo = -(-starts // size)
+            hi = ends // size
+            fits = lo < hi
+            if not fits.any():
+                continue
+            # New buckets: the part of [lo, hi) not covered by coarser levels
+            new_lo = np.where(covered, cov_hi // size, lo)
+            blocks = [(lo, np.where(covered, cov_lo // size, lo)), (new_lo, hi)]
+            amin, amax = self.levels[k]
+            for a, b in blocks:
+                buckets = _concat_ranges(a[fits], b[fits])
+                out += [amin[buckets], amax[buckets]]
+            cov_lo = np.where(fits, lo * size, cov_lo)
+            cov_hi = np.where(fits, hi * size, cov_hi)
+            covered |= fits
+
+        # Raw points the buckets do not cover
+        out.append(_concat_ranges(starts, np.where(covered, cov_lo, ends)))
+        out.append(_concat_ranges(np.where(covered, cov_hi, ends), ends))
+        return np.unique(np.concatenate(out).astype(np.intp))
+
+
+def _finite_extent(y):
+    """(nanmin, nanmax) of y, or (None, None) without any number."""
+    if len(y) == 0 or np.all(np.isnan(y)):
+        return None, None
+    return float(np.nanmin(y)), float(np.nanmax(y))
+
+
+class LineDecimator:
+    """
+    Full data of one plotted line; view() returns what to hand to
+    Line2D.set_data() for the current x limits and axes width.
+    `pyramid` (a MinMaxPyramid of y) makes views of huge curves cheap;
+    `x_sorted` skips the sortedness check when the caller already knows.
+    """
+    def __init__(self, x, y, mode="auto", marker=None, pyramid=None, x_sorted=None):
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+        self.mode = resolve_mode(mode, marker)
+        if x_sorted is None and self.mode != "none":
+            x_sorted = is_sorted(self.x)
+        if not x_sorted:
+            self.mode = "none"
+        self.pyramid = pyramid
+        self._last = None   # (key, view) of the last query
+        self._extent = None
+        self._x_extent = None   # only needed when x is not sorted
+
+    @property
+    def wants_pyramid(self):
+        return self.mode != "none" and len(self.x) >= PYRAMID_MIN_POINTS
+
+    def full_xlim(self):
+        """x limits spanning the whole curve (its view keeps the data limits)."""
+        if self.mode == "none" or len(self.x) == 0:
+            return (0.0, 1.0)
+        return (self.x[0], self.x[-1])
+
+    def data_corners(self):
+        """
+        [[xmin, ymin], [xmax, ymax]] of the full data, for Axes.update_datalim():
+        a decimated view (LTTB in particular) may not reach the extremes, and
+        batched lines are only counted through it.
+        """
+        if self._extent is None:
+            self._extent = _finite_extent(self.y)
+        ymin, ymax = self._extent
+        if len(self.x) == 0 or ymin is None:
+            return np.empty((0, 2))
+        if self.mode != "none":
+            return np.array([[self.x[0], ymin], [self.x[-1], ymax]])
+        if self._x_extent is None:
+            self._x_extent = _finite_extent(self.x)
+        xmin, xmax = self._x_extent
+        if xmin is None:
+            return np.empty((0, 2))
+        return np.array([[xmin, ymin], [xmax, ymax]])
+
+    def extend(self, x, y, n_new):
+        """Follow mode: the curve grew by n_new points (only those are checked)."""
+        if self.mode != "none":
+            tail = x[-n_new - 1:] if 0 < n_new < len(x) else x
+            if not is_sorted(tail):
+                self.mode = "none"
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+        self._x_extent = None
+        if self.pyramid is not None:
+            self.pyramid.update(self.y)
+        if self._extent is not None and 0 < n_new < len(y):
+            lo, hi = _finite_extent(self.y[-n_new:])
+            old_lo, old_hi = self._extent
+            if lo is not None:
+                self._extent = (lo if old_lo is None else min(lo, old_lo),
+                                hi if old_hi is None else max(hi, old_hi))
+        else:
+            self._extent = None
+        self._last = None
+
+    def view(self, xlim, width_px, transform=None):
+        x, y = self.x, self.y
+        if self.mode == "none":
+            return x, y
+
+        xmin, xmax = sorted(xlim)
+        width_px = max(int(width_px), 1)
+        key = (xmin, xmax, width_px, transform)
+        if self._last is not None and self._last[0] == key:
+            return self._last[1]
+
+        i0, i1 = visible_range(x, xmin, xmax)
+        if i1 - i0 <= _MAX_POINTS_PER_PIXEL * width_px:
+            result = x[i0:i1], y[i0:i1]
+        else:
+            edges = pixel_edges(xmin, xmax, width_px, transform)
+            if self.pyramid is not None and self.pyramid.n == len(y):
+                # Pixel columns as index ranges, then M4 over the pyramid's candidates
+                bounds = np.clip(np.searchsorted(x, edges), i0, i1)
+                starts = np.unique(np.concatenate(([i0], bounds)))
+                starts = starts[starts < i1]
+                cand = self.pyramid.candidates(starts, np.append(starts[1:], i1))
+                idx = cand[minmax_indices(x[cand], y[cand], edges)]
+            else:
+                idx = i0 + minmax_indices(x[i0:i1], y[i0:i1], edges)
+            if self.mode == "lttb":
+                # LTTB on the (lossless) envelope: same picture, bounded cost
+                idx = idx[lttb_indices(x[idx], y[idx], width_px)]
+            result = x[idx], y[idx]
+
+        self._last = (key, result)
+        return result
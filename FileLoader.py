@@ -0,0 +1,133 @@
+"""
+FileLoader.py
+
+Loads data files on a Qt thread pool so the GUI thread never parses.
+
+One task per file: several selected files load side by side, each task
+reports its progress and can be cancelled. Results come back as Qt
+signals, delivered on the GUI thread (queued connections), where the
+window registers them into the controller.
+"""
+
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from DataFile import LoadCancelled
+
+
+class _TaskSignals(QObject):
+    progress = pyqtSignal(str, float)   # path, fraction
+    loaded = pyqtSignal(str, object)    # path, DataFile
+    failed = pyqtSignal(str, str)       # path, error message
+    cancelled = pyqtSignal(str)         # path
+
+
+class _LoadTask(QRunnable):
+    def __init__(self, path, open_fn, signals):
+        super().__init__()
+        self.path = path
+        self.open_fn = open_fn
+        self.signals = signals
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        if self.cancel_event.is_set():
+            self.signals.cancelled.emit(self.path)
+            return
+        try:
+            df = self.open_fn(
+                self.path,
+                progress=lambda f: self.signals.progress.emit(self.path, f),
+                cancel=self.cancel_event,
+            )
+        except LoadCancelled:
+            self.signals.cancelled.emit(self.path)
+        except Exception as e:
+            self.signals.failed.emit(self.path, str(e))
+        else:
+            self.signals.loaded.emit(self.path, df)
+
+
+class FileLoader(QObject):
+    """
+    Background loader. `open_fn(path, progress=..., cancel=...)` does the actual
+    work (AppController.open_data_file); it runs on worker threads.
+    """
+    progress = pyqtSignal(int)          # overall percent of the current batch
+    loaded = pyqtSignal(str, object)    # path, DataFile
+    failed = pyqtSignal(str, str)       # path, error message
+    cancelled = pyqtSignal(str)         # path
+    finished = pyqtSignal()             # every pending file is done
+
+    def __init__(self, open_fn, parent=None):
+        super().__init__(parent)
+        self.open_fn = open_fn
+        self.pool = QThreadPool(self)
+        self._tasks = {}      # path -> _LoadTask still running / queued
+        self._fractions = {}  # path -> progress of the current batch
+
+        self._signals = _TaskSignals(self)
+        self._signals.progress.connect(self._on_progress)
+        self._signals.loaded.connect(self._on_loaded)
+        self._signals.failed.connect(self._on_failed)
+        self._signals.cancelled.connect(self._on_cancelled)
+
+    def is_busy(self):
+        return bool(self._tasks)
+
+    def load(self, paths):
+        """Queue files for loading. Paths already loading are ignored."""
+        for path in paths:
+            if path in self._tasks:
+                continue
+            task = _LoadTask(path, self.open_fn, self._signals)
+            task.setAutoDelete(False)
+            self._tasks[path] = task
+            self._fractions[path] = 0.0
+            self.pool.start(task)
+        self._emit_progress()
+
+    def cancel(self, path=None):
+        """Cancel one file, or every pending file when path is None."""
+        tasks = self._tasks.values() if path is None else [self._tasks.get(path)]
+        for task in tasks:
+            if task is not None:
+                task.cancel_event.set()
+
+    # ------------------------------------------------------------------
+    # Task results (GUI thread)
+    # ------------------------------------------------------------------
+    def _on_progress(self, path, fraction):
+        if path in self._tasks:
+            self._fractions[path] = fraction
+            self._emit_progress()
+
+    def _on_loaded(self, path, data_file):
+        self._done(path)
+        self.loaded.emit(path, data_file)
+        self._maybe_finished()
+
+    def _on_failed(self, path, msg):
+        self._done(path)
+        self.failed.emit(path, msg)
+        self._maybe_finished()
+
+    def _on_cancelled(self, path):
+        self._done(path)
+        self.cancelled.emit(path)
+        self._maybe_finished()
+
+    def _done(self, path):
+        self._tasks.pop(path, None)
+        self._fractions[path] = 1.0
+        self._emit_progress()
+
+    def _emit_progress(self):
+        if self._fractions:
+            self.progress.emit(int(100 * sum(self._fractions.values()) / len(self._fractions)))
+
+    def _maybe_finished(self):
+        if not self._tasks:
+            self._fractions.clear()
+            self.finished.emit()
@@ -80,4 +80,210 @@ def is_number(s):
         float(s.replace(",", "."))
         return True
     except ValueError:
-        return False
\ No newline at end of file
+        return False
+
+
+# =========================
+# Format sniffing
+# =========================
+
+# Candidate delimiters, in order of preference on a tie (None = whitespace)
+DELIMITERS = (";", ",", "\t", "|", None)
+
+
+class FormatProfile:
+    """
+    How a data file is written, as guessed by sniff_format() from a sample:
+    - delimiter: field separator (None = runs of whitespace)
+    - decimal: "." or ",", "mixed" (no single convention reads the numbers)
+      or None (integers only)
+    - thousands: "." or "," grouping digits by three, or None
+    - quoted: some numeric fields are wrapped in quotes
+    - ncols: fields per data row
+    - consistency: share of the sampled data lines with ncols numeric fields
+    """
+    def __init__(self, delimiter, decimal=None, quoted=False, ncols=0, consistency=0.0,
+                 thousands=None):
+        self.delimiter = delimiter
+        self.decimal = decimal
+        self.thousands = thousands
+        self.quoted = quoted
+        self.ncols = ncols
+        self.consistency = consistency
+
+    @property
+    def ambiguous(self):
+        """No single number convention: fields are parsed with parse_float's per-field guesses."""
+        return self.decimal == "mixed"
+
+    def float_parser(self):
+        return float_parser(self.decimal, self.thousands)
+
+    def to_dict(self):
+        """JSON-able fields (see DataCache), read back with from_dict()."""
+        return {"delimiter": self.delimiter, "decimal": self.decimal, "thousands": self.thousands,
+                "quoted": self.quoted, "ncols": self.ncols, "consistency": self.consistency}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**d)
+
+    def __repr__(self):
+        return (f"FormatProfile(delimiter={self.delimiter!r}, decimal={self.decimal!r}, "
+                f"thousands={self.thousands!r}, quoted={self.quoted}, ncols={self.ncols}, "
+                f"consistency={self.consistency:.2f})")
+
+
+# =========================
+# Per-convention number parsing
+# =========================
+
+# (decimal, thousands) conventions sniff_format() chooses from, in order of
+# preference when several read a sample equally well
+CONVENTIONS = ((".", None), (",", None), (".", ","), (",", "."))
+
+_plain_float_re = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+
+# A thousands separator not followed by exactly three digits, not preceded
+# by one to three, or found after the decimal mark. Keyed by (thousands, decimal)
+_bad_group_res = {
+    (".", ","): re.compile(r"\.(?:(?!\d{3}(?!\d))|(?<!\d\.)|(?<=\d{4}\.))|,\d*\."),
+    (",", "."): re.compile(r",(?:(?!\d{3}(?!\d))|(?<!\d,)|(?<=\d{4},))|\.\d*,"),
+}
+
+_float_parsers = {}
+
+
+def bad_group_re(thousands, decimal):
+    """Regex finding a `thousands` separator that does not group the integer digits by three."""
+    return _bad_group_res[thousands, decimal]
+
+
+def float_parser(decimal, thousands=None):
+    """
+    Converter field -> float (None if not a number) for one convention:
+    `decimal` "." or ",", optional `thousands` separator ("." or ","; spaces
+    are always dropped like parse_float does). Nothing is guessed per field:
+    with decimal "," a field like "1.5" is not a number, unless "." groups
+    thousands and is followed by three digits.
+    An unknown convention (decimal None or "mixed") gives parse_float.
+    """
+    if decimal not in (".", ","):
+        return parse_float
+    key = (decimal, thousands)
+    convert = _float_parsers.get(key)
+    if convert is not None:
+        return convert
+
+    other = "," if decimal == "." else "."
+    bad_group = bad_group_re(thousands, decimal) if thousands else None
+
+    def convert(s):
+        if s is None:
+            return None
+        s = str(s).strip()
+        if len(s) > 1 and s[0] in "\"'" and s[-1] == s[0]:
+            s = s[1:-1].strip()
+        s = s.replace(" ", "")
+        if bad_group is not None and thousands in s:
+            if bad_group.search(s):
+                return None
+            s = s.replace(thousands, "")
+        if other in s:
+            return None
+        if decimal == ",":
+            s = s.replace(",", ".")
+        if not _plain_float_re.fullmatch(s):
+            return None
+        return float(s)
+
+    _float_parsers[key] = convert
+    return convert
+
+
+def _number_convention(fields, min_share=0.9):
+    """
+    (decimal, thousands) of the CONVENTIONS reading the most of `fields`
+    (numbers as parse_float accepts them); ("mixed", None) if none reads
+    min_share of the fields using a separator, (None, None) if none does.
+    """
+    marked = [p for p in fields if "." in p or "," in p]
+    if not marked:
+        return None, None
+    marked = marked[::max(1, len(marked) // 4096)]
+    best_n, best = -1, None
+    for decimal, thousands in CONVENTIONS:
+        convert = float_parser(decimal, thousands)
+        n = sum(1 for p in marked if convert(p) is not None)
+        if n > best_n:
+            best_n, best = n, (decimal, thousands)
+    if best_n < min_share * len(marked):
+        return "mixed", None
+    return best
+
+
+def _numeric_fields(line, delimiter):
+    """Fields of line if they are all numbers, else None."""
+    parts = split_line(line, delimiter)
+    for p in parts:
+        if parse_float(p) is None:
+            return None
+    return parts
+
+
+def _score_delimiter(delimiter, head, body):
+    """
+    (score, ncols, consistency) of one candidate; score is None if no
+    sampled line is numeric. The score ranks, in order: share of the sampled
+    lines with ncols numeric fields, header agreeing with it, fields needing
+    no thousands-space removal, columns.
+    """
+    rows = [_numeric_fields(l, delimiter) for l in head]
+    first = next((i for i, r in enumerate(rows) if r is not None), len(rows))
+    rows = rows[first:] + [_numeric_fields(l, delimiter) for l in body]
+    if not any(r is not None for r in rows):
+        return None, 0, 0.0
+
+    counts = {}
+    for r in rows:
+        if r is not None:
+            counts[len(r)] = counts.get(len(r), 0) + 1
+    ncols = max(counts, key=lambda n: (counts[n], n))
+    if ncols == 1 and delimiter is not None:
+        return None, 0, 0.0  # delimiter not in the data: single column, whitespace rules
+    consistency = counts[ncols] / len(rows)
+    # Judged on the whole sample: a delimiter only making sense of a few
+    # late lines must not win over one reading the bulk of the file
+    coverage = counts[ncols] / (len(head) + len(body))
+
+    header_ok = first == 0 or len(split_line(head[first - 1], delimiter)) == ncols
+    fields = [p for r in rows if r is not None and len(r) == ncols for p in r]
+    clean = sum(1 for p in fields if not re.search(r"\S\s+\S", p)) / len(fields)
+    return (coverage, header_ok, clean, ncols), ncols, consistency
+
+
+def sniff_format(head, body=(), candidates=DELIMITERS):
+    """
+    Guess the FormatProfile of a file from sampled lines (comments and blank
+    lines already removed): `head` are its first lines, preamble included,
+    `body` lines taken further down. Every candidate delimiter splits the
+    sample; the one giving the most consistent count of numeric fields wins.
+    Returns None if no line of the sample is numeric.
+    """
+    best = best_ncols = delimiter = None
+    for d in candidates:
+        score, ncols, consistency = _score_delimiter(d, head, body)
+        if score is not None and (best is None or score > best):
+            best, best_ncols, best_consistency, delimiter = score, ncols, consistency, d
+    if best is None:
+        return None
+
+    # Number convention and quoting, from the numeric fields of the winner
+    fields = []
+    for line in list(head) + list(body):
+        parts = _numeric_fields(line, delimiter)
+        if parts is not None and len(parts) == best_ncols:
+            fields += parts
+    quoted = any(len(p) > 1 and p[0] in "\"'" and p[-1] == p[0] for p in fields)
+    decimal, thousands = _number_convention(fields)
+    return FormatProfile(delimiter, decimal, quoted, best_ncols, best_consistency, thousands)
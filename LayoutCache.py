@@ -0,0 +1,236 @@
+"""
+LayoutCache.py
+
+fig.tight_layout() without measuring text that did not change.
+
+tight_layout measures the tight bbox (tick labels, axis labels, titles,
+legends) of every subplot to find how far its decorations stick out of the
+axes, then turns these overhangs into subplot parameters for the current
+figure size. Measuring is the expensive part (every tick label's text
+extent), while the overhangs themselves, in inches, only depend on what is
+drawn around the axes, not on where the axes are.
+
+TightLayoutCache keeps the overhangs of each subplot cell keyed by a cheap
+signature of its decorations (view limits, number of ticks that fit, tick
+settings, label / title / legend texts, fonts). On a resize or a change
+to one subplot, only the cells whose signature changed are measured; the
+subplot parameters are then computed like matplotlib's tight_layout does.
+
+A legend only sticks out of its axes when it does not fit in it (or was
+dragged out): the axes size is then part of the signature.
+
+The signatures and measurements use private matplotlib API: if it is
+missing in the installed version, the cache turns itself off and every call
+is a plain fig.tight_layout().
+"""
+
+import logging
+from contextlib import nullcontext
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.font_manager import FontProperties
+from matplotlib.transforms import Bbox
+
+try:
+    from matplotlib.artist import _get_tightbbox_for_layout_only
+except ImportError:
+    _get_tightbbox_for_layout_only = None
+
+log = logging.getLogger(__name__)
+
+
+class TightLayoutCache:
+    def __init__(self, fig, max_entries=512):
+        self.fig = fig
+        self.max_entries = max_entries
+        self._overhangs = {}   # cell signature -> (left, bottom, right, top) in inches
+        self._legend_sizes = {}  # legend signature -> (width, height) in pixels
+        # Off when this matplotlib lacks the private API used (plain tight_layout)
+        self.enabled = _get_tightbbox_for_layout_only is not None
+
+        # Counters (see stats())
+        self.layouts = 0    # tight_layout() calls
+        self.measured = 0   # cells measured
+        self.reused = 0     # cells served from the cache
+
+    def tight_layout(self, pad=1.08, h_pad=None, w_pad=None):
+        """Same as fig.tight_layout(pad, h_pad, w_pad), measuring only changed subplots."""
+        self.layouts += 1
+        if self.enabled:
+            try:
+                kwargs = self._cached_params(pad, h_pad, w_pad)
+            except AttributeError:
+                # Private matplotlib API changed: plain tight_layout from now on
+                log.warning("Layout cache disabled, using fig.tight_layout()", exc_info=True)
+                self.enabled = False
+                self.clear()
+                kwargs = None
+        else:
+            kwargs = None
+        if kwargs is None:
+            # Not cacheable, does not fit or nothing to lay out: let matplotlib decide / warn
+            self.fig.tight_layout(pad=pad, h_pad=h_pad, w_pad=w_pad)
+        else:
+            self.fig.subplots_adjust(**kwargs)
+
+    def clear(self):
+        self._overhangs.clear()
+        self._legend_sizes.clear()
+
+    def stats(self):
+        return {"layouts": self.layouts, "measured": self.measured, "reused": self.reused}
+
+    def reset_stats(self):
+        self.layouts = self.measured = self.reused = 0
+
+    # ------------------------------------------------------------------
+    def _cached_params(self, pad, h_pad, w_pad):
+        """subplots_adjust() kwargs from the cached overhangs, None to use fig.tight_layout()."""
+        cells = self._cells()
+        if cells is None:
+            return None
+
+        renderer = None
+        overhangs = []
+        for ss, axs in cells:
+            if not any(ax.get_visible() for ax in axs):
+                continue
+            key = self._cell_signature(axs)
+            overhang = self._overhangs.get(key)
+            if overhang is None:
+                if renderer is None:
+                    renderer = self.fig._get_renderer()
+                overhang = self._measure(ss, axs, renderer)
+                self._remember(self._overhangs, key, overhang)
+                self.measured += 1
+            else:
+                self.reused += 1
+            overhangs.append((ss, overhang))
+        return self._subplot_params(overhangs, pad, h_pad, w_pad) if overhangs else None
+
+    def _cells(self):
+        """[(SubplotSpec, [axes])] of a single-GridSpec figure, None if it is anything else."""
+        fig = self.fig
+        if fig._suptitle or fig._supxlabel or fig._supylabel:
+            return None
+        cells = {}
+        gridspec = None
+        for ax in fig.axes:
+            ss = ax.get_subplotspec()
+            if ss is None:
+                return None
+            if gridspec is None:
+                gridspec = ss.get_gridspec()
+            elif ss.get_gridspec() is not gridspec:
+                return None
+            cells.setdefault(ss, []).append(ax)
+        return list(cells.items()) if cells else None
+
+    def _remember(self, cache, key, value):
+        if len(cache) >= self.max_entries:
+            cache.pop(next(iter(cache)))  # oldest
+        cache[key] = value
+
+    def _measure(self, ss, axs, renderer):
+        """How far the decorations of one cell stick out of it, in inches."""
+        with getattr(renderer, "_draw_disabled", nullcontext)():
+            tight = Bbox.union([_get_tightbbox_for_layout_only(ax, renderer)
+                                for ax in axs if ax.get_visible()])
+        cell = ss.get_position(self.fig).transformed(self.fig.transFigure)
+        dpi = self.fig.dpi
+        return ((cell.x0 - tight.x0) / dpi, (cell.y0 - tight.y0) / dpi,
+                (tight.x1 - cell.x1) / dpi, (tight.y1 - cell.y1) / dpi)
+
+    def _subplot_params(self, overhangs, pad, h_pad, w_pad):
+        """matplotlib's _auto_adjust_subplotpars, from overhangs in inches."""
+        rows, cols = overhangs[0][0].get_gridspec().get_geometry()
+        fig_w, fig_h = self.fig.get_size_inches()
+        font_inch = FontProperties(size=rcParams["font.size"]).get_size_in_points() / 72
+        pad_inch = pad * font_inch
+        vpad_inch = h_pad * font_inch if h_pad is not None else pad_inch
+        hpad_inch = w_pad * font_inch if w_pad is not None else pad_inch
+
+        vspaces = np.zeros((rows + 1, cols))
+        hspaces = np.zeros((rows, cols + 1))
+        for ss, (left, bottom, right, top) in overhangs:
+            rowspan, colspan = ss.rowspan, ss.colspan
+            hspaces[rowspan, colspan.start] += left / fig_w
+            hspaces[rowspan, colspan.stop] += right / fig_w
+            vspaces[rowspan.start, colspan] += top / fig_h
+            vspaces[rowspan.stop, colspan] += bottom / fig_h
+
+        margin_left = max(hspaces[:, 0].max(), 0) + pad_inch / fig_w
+        margin_right = max(hspaces[:, -1].max(), 0) + pad_inch / fig_w
+        margin_top = max(vspaces[0, :].max(), 0) + pad_inch / fig_h
+        margin_bottom = max(vspaces[-1, :].max(), 0) + pad_inch / fig_h
+        if margin_left + margin_right >= 1 or margin_bottom + margin_top >= 1:
+            return None
+
+        kwargs = dict(left=margin_left, right=1 - margin_right,
+                      bottom=margin_bottom, top=1 - margin_top)
+        if cols > 1:
+            hspace = hspaces[:, 1:-1].max() + hpad_inch / fig_w
+            h_axes = (1 - margin_right - margin_left - hspace * (cols - 1)) / cols
+            if h_axes < 0:
+                return None
+            kwargs["wspace"] = hspace / h_axes
+        if rows > 1:
+            vspace = vspaces[1:-1, :].max() + vpad_inch / fig_h
+            v_axes = (1 - margin_top - margin_bottom - vspace * (rows - 1)) / rows
+            if v_axes < 0:
+                return None
+            kwargs["hspace"] = vspace / v_axes
+        return kwargs
+
+    # ------------------------------------------------------------------
+    # Signatures: equal signatures -> same overhangs
+    # ------------------------------------------------------------------
+    def _cell_signature(self, axs):
+        return (self.fig.dpi, rcParams["font.size"], tuple(rcParams["font.family"]),
+                tuple(self._axes_signature(ax) for ax in axs))
+
+    def _axes_signature(self, ax):
+        if not ax.get_visible():
+            return None
+        return (tuple(ax.get_title(loc) for loc in ("left", "center", "right")),
+                _axis_signature(ax.xaxis), _axis_signature(ax.yaxis),
+                self._legend_key(ax, ax.get_legend()))
+
+    def _legend_key(self, ax, legend):
+        if legend is None:
+            return None
+        key = _legend_signature(legend)
+        size = self._legend_sizes.get(key)
+        if size is None:
+            renderer = self.fig._get_renderer()
+            with getattr(renderer, "_draw_disabled", nullcontext)():
+                bbox = legend.get_window_extent(renderer)
+            size = (bbox.width, bbox.height)
+            self._remember(self._legend_sizes, key, size)
+        pad = 2 * legend.borderaxespad * legend._fontsize * self.fig.dpi / 72
+        if (isinstance(legend._loc, int) and size[0] + pad <= ax.bbox.width
+                and size[1] + pad <= ax.bbox.height):
+            return key  # placed inside the axes
+        return key, tuple(np.round(ax.bbox.size, 1))
+
+
+def _axis_signature(axis):
+    if not axis.get_visible():
+        return None
+    # The tick labels follow from the view limits, the locator / formatter
+    # and how many ticks fit on the axis (AutoLocator)
+    major, minor = axis.get_major_locator(), axis.get_minor_locator()
+    return (tuple(axis.get_view_interval()), axis.get_tick_space(), axis.get_scale(),
+            type(major), getattr(major, "_nbins", None), type(minor),
+            type(axis.get_major_formatter()), type(axis.get_minor_formatter()),
+            repr(sorted(axis._major_tick_kw.items())), repr(sorted(axis._minor_tick_kw.items())),
+            axis.label.get_text(), axis.label.get_visible(), axis.get_label_position(),
+            axis.offsetText.get_visible())
+
+
+def _legend_signature(legend):
+    if legend is None:
+        return None
+    return (legend.get_visible(), legend.get_in_layout(), repr(legend._loc),
+            tuple(t.get_text() for t in legend.get_texts()))
@@ -19,21 +19,30 @@ import os
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QPushButton, QLabel, QListWidget, QLineEdit, QComboBox,
     QFileDialog, QMessageBox, QHBoxLayout, QVBoxLayout, QGridLayout, QSlider, QCheckBox, QScrollArea, QApplication, QDialog, QAbstractButton,
+    QProgressBar, QListWidgetItem, QStyle,
 )
 from PyQt5.QtCore import Qt, QTimer
 
 from PlotCanvas import PlotCanvas
 from AppController import AppController
+from FileLoader import FileLoader
+from Decimation import DECIMATION_MODES
+from ChangeModel import untracked
 from Color_modules import (
     PLOTLY_PALETTES,
     populate_color_combo,
     selected_color,
     ensure_color_in_combo,
 )
-from DataFile import load_data_file
 from AdvancedDialog import *
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT
 
+
+def _sample_lines(diag, limit=None):
+    """First rows a load skipped (see DataFile.LoadDiagnostics), one per line."""
+    return [f"{reason}: {line[:80]}" for reason, line in diag.samples[:limit]]
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -47,14 +56,20 @@ class MainWindow(QMainWindow):
         self.canvas = PlotCanvas()
         self.controller = AppController(self.canvas)
 
+        # Data files are parsed on worker threads (see FileLoader)
+        self.file_loader = FileLoader(self.controller.open_data_file, self)
 
+        # -------------------------
+        # Redraw once the canvas has stopped resizing (PlotCanvas debounces)
+        # -------------------------
+        self.canvas.resize_settled.connect(self.on_canvas_resized)
 
         # -------------------------
-        # Debounced redraw on resize
+        # Follow mode: poll growing files (~20 fps)
         # -------------------------
-        self._resize_timer = QTimer(self)
-        self._resize_timer.setSingleShot(True)
-        self._resize_timer.timeout.connect(self.controller.update_plot)
+        self._follow_timer = QTimer(self)
+        self._follow_timer.setInterval(50)
+        self._follow_timer.timeout.connect(self.controller.poll_followed_files)
 
 
         # Deactivate subplot list initially
@@ -68,18 +83,14 @@ class MainWindow(QMainWindow):
     # ------------------------------------------------------------------
     # Qt events
     # ------------------------------------------------------------------
-    def resizeEvent(self, event):
+    def on_canvas_resized(self):
         """
-        Qt fires many resize events while the user is resizing / toggling fullscreen.
-        Debounce redraw so we repaint only once after the resizing stops.
+        The canvas was resized (window resize / fullscreen) and the figure
+        gets a new size: lay it out again and render once.
         """
-        super().resizeEvent(event)
-
         # Mark plot as needing layout update (your PlotConfig uses .dirty)
         self.controller.config.dirty = True
-
-        # Restart timer on each resize event
-        self._resize_timer.start(150)
+        self.controller.request_render(force=True)
 
     # ------------------------------------------------------------------
     # UI construction
@@ -190,10 +201,25 @@ class MainWindow(QMainWindow):
         self.control_layout.addWidget(self.add_file_btn)
         self.control_layout.addWidget(self.remove_file_btn)
 
+        # Loading progress (hidden while idle)
+        load_layout = QHBoxLayout()
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.cancel_load_btn = QPushButton("Cancel")
+        load_layout.addWidget(self.load_progress)
+        load_layout.addWidget(self.cancel_load_btn)
+        self.control_layout.addLayout(load_layout)
+        self.load_progress.setVisible(False)
+        self.cancel_load_btn.setVisible(False)
+
         self.control_layout.addWidget(QLabel("Files"))
         self.files_list = QListWidget()
         self.control_layout.addWidget(self.files_list)
 
+        # Live tail of the selected file (rows appended by an acquisition)
+        self.follow_checkbox = QCheckBox("Follow selected file")
+        self.control_layout.addWidget(self.follow_checkbox)
+
     def _build_axis_labels_section(self):
         """X/Y axis label edits (two columns)."""
         grid = QGridLayout()
@@ -224,6 +250,16 @@ class MainWindow(QMainWindow):
         ])
         self.control_layout.addWidget(self.dimension_combo)
 
+        self.crosshair_checkbox = QCheckBox("Crosshair")
+        self.control_layout.addWidget(self.crosshair_checkbox)
+
+        self.async_render_checkbox = QCheckBox("Render in background")
+        self.control_layout.addWidget(self.async_render_checkbox)
+
+        self.progressive_resize_checkbox = QCheckBox("Scaled preview while resizing")
+        self.progressive_resize_checkbox.setChecked(self.canvas.progressive_resize)
+        self.control_layout.addWidget(self.progressive_resize_checkbox)
+
     def _build_curves_section(self):
         """Curve list + curve settings (name, x/y, axis)."""
         self.add_curve_btn = QPushButton("Add Curve")
@@ -274,6 +310,14 @@ class MainWindow(QMainWindow):
         self.subplot_index_combo.addItems(["0"])
         subplot_layout.addWidget(self.subplot_index_combo)
 
+        # Points actually drawn for large curves (see Decimation.py)
+        decimation_layout = QVBoxLayout()
+        decimation_layout.addWidget(QLabel("Decimation"))
+        axis_subplot_layout.addLayout(decimation_layout)
+        self.decimation_combo = QComboBox()
+        self.decimation_combo.addItems(DECIMATION_MODES)
+        decimation_layout.addWidget(self.decimation_combo)
+
         self.control_layout.addLayout(axis_subplot_layout)
 
 
@@ -442,6 +486,16 @@ class MainWindow(QMainWindow):
         # --- File actions ---
         self.add_file_btn.clicked.connect(self.load_file)
         self.remove_file_btn.clicked.connect(self.remove_selected_file)
+        self.cancel_load_btn.clicked.connect(lambda: self.file_loader.cancel())
+        self.files_list.currentRowChanged.connect(self.on_file_selected)
+        self.files_list.itemDoubleClicked.connect(self.show_file_diagnostics)
+        self.follow_checkbox.toggled.connect(self.on_follow_toggled)
+
+        # --- Background loading ---
+        self.file_loader.progress.connect(self.load_progress.setValue)
+        self.file_loader.loaded.connect(self.on_file_loaded)
+        self.file_loader.failed.connect(self.on_file_load_failed)
+        self.file_loader.finished.connect(self.on_file_loading_finished)
 
         # --- Subplot actions ---
         self.subplot_list.currentRowChanged.connect(self.on_subplot_selected)
@@ -469,6 +523,7 @@ class MainWindow(QMainWindow):
         self.curve_name_edit.editingFinished.connect(self.on_curve_settings_changed)
 
         self.color_combo.currentTextChanged.connect(self.on_curve_settings_changed)
+        self.decimation_combo.currentTextChanged.connect(self.on_curve_settings_changed)
         # self.marker_combo.currentTextChanged.connect(self.on_curve_settings_changed)
         # self.marker_size_combo.valueChanged.connect(self.on_curve_settings_changed)
         # self.linestyle_combo.currentTextChanged.connect(self.on_curve_settings_changed)
@@ -476,6 +531,9 @@ class MainWindow(QMainWindow):
 
         # --- Canvas settings ---
         self.dimension_combo.currentTextChanged.connect(self.on_canvas_settings_changed)
+        self.crosshair_checkbox.toggled.connect(self.canvas.set_crosshair)
+        self.async_render_checkbox.toggled.connect(self.canvas.set_async_render)
+        self.progressive_resize_checkbox.toggled.connect(self.canvas.set_progressive_resize)
         # self.x_min_edit.editingFinished.connect(self.on_canvas_settings_changed)
         # self.x_max_edit.editingFinished.connect(self.on_canvas_settings_changed)
         # self.y_min_edit.editingFinished.connect(self.on_canvas_settings_changed)
@@ -490,7 +548,7 @@ class MainWindow(QMainWindow):
         self.advanced_btn.clicked.connect(self.open_advanced_dialog)
 
         # --- Manual plot update ---
-        self.plot_btn.clicked.connect(self.controller.update_plot)
+        self.plot_btn.clicked.connect(lambda: self.controller.request_render(force=True))
 
     # ------------------------------------------------------------------
     # Handlers: axis labels
@@ -498,12 +556,12 @@ class MainWindow(QMainWindow):
     def on_xlabel_changed(self):
         """Update config xlabel when user commits the edit."""
         self.apply_subplot_labels()
-        self.controller.update_plot()
+        self.controller.request_render()
 
     def on_ylabel_changed(self):
         """Update config ylabel when user commits the edit."""
         self.apply_subplot_labels()
-        self.controller.update_plot()
+        self.controller.request_render()
 
     # ------------------------------------------------------------------
     # Handlers: palette
@@ -525,41 +583,100 @@ class MainWindow(QMainWindow):
             c = self.controller.curves[idx]
             c.palette_name = name
             c.color = selected_color(self.color_combo)
-            self.controller.update_plot()
+            self.controller.request_render()
 
     # ------------------------------------------------------------------
     # File operations
     # ------------------------------------------------------------------
     def load_file(self):
-        """Open a file picker, load data file, add it to controller.data_files."""
-        path, _ = QFileDialog.getOpenFileName(
+        """Open a file picker and load the selected data files in the background."""
+        paths, _ = QFileDialog.getOpenFileNames(
             self,
-            "Open data file",
+            "Open data files",
             "",
             "Data Files (*.csv *.txt *.dat);;CSV Files (*.csv);;Text Files (*.txt *.dat);;All Files (*)"
         )
-        if not path:
+        if not paths:
             return
 
-        try:
-            file_name = os.path.basename(path)
-            data_file = load_data_file(path)
+        self.load_progress.setValue(0)
+        self.load_progress.setVisible(True)
+        self.cancel_load_btn.setVisible(True)
+        self.file_loader.load(paths)
+
+    def on_file_loaded(self, path, data_file):
+        """A background load finished: add the file to controller.data_files."""
+        # Store by displayed filename (your UI expects this convention)
+        file_name = os.path.basename(path)
+        self.controller.register_data_file(file_name, data_file)
+        self.refresh_files_list()
+        self.populate_all_columns()
 
-            # Store by displayed filename (your UI expects this convention)
-            self.controller.data_files[file_name] = data_file
+        diag = data_file.diagnostics
+        if diag is not None and diag.has_issues:
+            # Also on the file item (icon + tooltip, details on double-click)
+            self.statusBar().showMessage(
+                f"{file_name}: {diag.summary()} (double-click the file for details)", 15000)
 
-            self.refresh_files_list()
-            self.populate_all_columns()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
+    def on_file_load_failed(self, path, msg):
+        QMessageBox.critical(self, "Error", f"{os.path.basename(path)}: {msg}")
+
+    def on_file_loading_finished(self):
+        self.load_progress.setVisible(False)
+        self.cancel_load_btn.setVisible(False)
 
     def refresh_files_list(self):
         """Rebuild the file list widget from controller state."""
         self.files_list.blockSignals(True)
         self.files_list.clear()
-        for file_name in self.controller.data_files:
-            self.files_list.addItem(file_name)
+        for file_name, data_file in self.controller.data_files.items():
+            item = QListWidgetItem(file_name)
+            diag = data_file.diagnostics
+            if diag is not None and diag.has_issues:
+                item.setIcon(self.style().standardIcon(QStyle.SP_MessageBoxWarning))
+                item.setToolTip("\n".join([diag.summary()] + _sample_lines(diag, 5)))
+            self.files_list.addItem(item)
         self.files_list.blockSignals(False)
+        self.on_file_selected(self.files_list.currentRow())
+        self._update_follow_timer()
+
+    def show_file_diagnostics(self, item):
+        """What loading the file skipped, with the first rows dropped."""
+        data_file = self.controller.data_files.get(item.text())
+        diag = data_file.diagnostics if data_file is not None else None
+        if diag is None or not diag.has_issues:
+            return
+        box = QMessageBox(QMessageBox.Warning, "Load report", f"{item.text()}: {diag.summary()}",
+                          QMessageBox.Ok, self)
+        if diag.samples:
+            box.setDetailedText("\n".join(_sample_lines(diag)))
+        box.exec_()
+
+    def on_file_selected(self, idx):
+        """Reflect the follow state of the selected file in the checkbox."""
+        item = self.files_list.item(idx) if idx >= 0 else None
+        self.follow_checkbox.blockSignals(True)
+        self.follow_checkbox.setEnabled(item is not None)
+        self.follow_checkbox.setChecked(
+            item is not None and item.text() in self.controller.followed_files)
+        self.follow_checkbox.blockSignals(False)
+
+    def on_follow_toggled(self, checked):
+        item = self.files_list.currentItem()
+        if item is None:
+            return
+        try:
+            self.controller.follow_file(item.text(), checked)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Error", f"Cannot follow {item.text()}: {e}")
+            self.on_file_selected(self.files_list.currentRow())
+        self._update_follow_timer()
+
+    def _update_follow_timer(self):
+        if self.controller.followed_files:
+            self._follow_timer.start()
+        else:
+            self._follow_timer.stop()
 
     def remove_selected_file(self):
         """Remove the currently selected file from controller and refresh UI."""
@@ -572,7 +689,6 @@ class MainWindow(QMainWindow):
 
         self.refresh_files_list()
         self.populate_all_columns()
-        self.controller.update_plot()
 
     # ------------------------------------------------------------------
     # Column population (all files)
@@ -646,6 +762,7 @@ class MainWindow(QMainWindow):
             # linewidth=float(self.linewidth_combo.currentText()),
             x_data_file=x_data_file,
             y_data_file=y_data_file,
+            decimation=self.decimation_combo.currentText(),
         )
 
         self.refresh_curve_list()
@@ -655,8 +772,6 @@ class MainWindow(QMainWindow):
         self.curve_list.setCurrentRow(new_idx)
         self.on_curve_selected(new_idx)
 
-        self.controller.update_plot()
-
     def remove_selected_curve(self):
         """Remove selected curve from controller and redraw."""
         idx = self.curve_list.currentRow()
@@ -665,7 +780,6 @@ class MainWindow(QMainWindow):
 
         self.controller.remove_curve(idx)
         self.refresh_curve_list()
-        self.controller.update_plot()
 
     # ------------------------------------------------------------------
     # Curve selection -> UI synchronization
@@ -682,7 +796,8 @@ class MainWindow(QMainWindow):
         # Block signals for all widgets we will set
         widgets_to_block = [
             self.x_combo, self.y_combo, self.axis_combo, self.curve_name_edit,
-            self.palette_combo, self.color_combo, self.subplot_index_combo
+            self.palette_combo, self.color_combo, self.subplot_index_combo,
+            self.decimation_combo,
         ]
         for w in widgets_to_block:
             w.blockSignals(True)
@@ -717,6 +832,7 @@ class MainWindow(QMainWindow):
 
         # Axis + style
         self.axis_combo.setCurrentText(c.axis)
+        self.decimation_combo.setCurrentText(c.decimation)
         # self.marker_combo.setCurrentText(c.marker)
         # self.marker_size_combo.setValue(c.marker_size)
         # self.linestyle_combo.setCurrentText(c.linestyle)
@@ -746,6 +862,7 @@ class MainWindow(QMainWindow):
 
         c = self.controller.curves[idx]
         c.name = self.curve_name_edit.text().strip() or c.name
+        c.decimation = self.decimation_combo.currentText()
 
         # Parse "filename: column" from X/Y combos
         x_text = self.x_combo.currentText()
@@ -792,7 +909,7 @@ class MainWindow(QMainWindow):
 
         self.curve_list.setCurrentRow(idx)
 
-        self.controller.update_plot()
+        self.controller.request_render()
 
     # ------------------------------------------------------------------
     # Canvas settings -> config update
@@ -833,7 +950,7 @@ class MainWindow(QMainWindow):
             #     float(ymax_text) if ymax_text else None,
             # )
 
-            self.controller.update_plot()
+            self.controller.request_render()
         except Exception:
             # Ignore bad inputs (e.g. partially typed numbers)
             pass
@@ -843,7 +960,7 @@ class MainWindow(QMainWindow):
         if dlg.exec_() == QDialog.Accepted:
 
             dlg.apply_to_config()
-            self.controller.update_plot()
+            self.controller.request_render()
             max_index = dlg.get_max_subplot_index()
             self.populate_subplot_indices(max_index)
             self.refresh_subplot_list()
@@ -1079,6 +1196,8 @@ class MainWindow(QMainWindow):
             ov = cfg.subplots_config.setdefault(i0, {})
             ov["yticksN"] = ytN
 
+    # The figure already shows what is synced back here: don't re-render it
+    @untracked()
     def _sync_labels_from_mpl(self, event=None):
         if self._skip_next_draw_event:
             self._skip_next_draw_event = False
@@ -1,9 +1,46 @@
+import io
+import logging
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PyQt5.QtCore import QRectF, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter, QResizeEvent
+from PyQt5.QtWidgets import QWidget
 from Color_modules import PLOTLY_PALETTES
+from Decimation import LineDecimator, resolve_mode
+from LayoutCache import TightLayoutCache
+from matplotlib import rcParams
+from matplotlib.backend_bases import DrawEvent
+try:
+    from matplotlib.axis import Ticker     # private (see _link_shared)
+except ImportError:
+    Ticker = None
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
 from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.text import Text
+from matplotlib.transforms import IdentityTransform
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.ticker import MaxNLocator, AutoMinorLocator
+from matplotlib.ticker import AutoLocator, MaxNLocator, AutoMinorLocator
+
+
+log = logging.getLogger(__name__)
+
+def _reset_subplotpars(fig):
+    """Subplot parameters back to the rcParams defaults (SubplotParams.reset() of newer matplotlib)."""
+    fig.subplotpars.update(**{k: rcParams["figure.subplot." + k]
+                              for k in ("left", "right", "bottom", "top", "wspace", "hspace")})
+
 
 class PlotCanvas(FigureCanvas):
+    # (generation, RendererAgg or None) from the background render thread
+    _frame_ready = pyqtSignal(object)
+    # The canvas stopped resizing and the figure needs another size:
+    # draw_curves() should run again (MainWindow re-renders on it)
+    resize_settled = pyqtSignal()
+
     def __init__(self):
         self.fig = Figure()
         self.axes = []
@@ -11,9 +48,51 @@ class PlotCanvas(FigureCanvas):
         self._last_layout = None
         self._last_shared_x = None
         self._last_shared_y = None
+        # Reshape the grid keeping the axes (see _reshape_subplots); turned
+        # off if this matplotlib does not have the internals it relies on
+        self.reshape_in_place = Ticker is not None
+        self._decimators = {}  # Line2D -> LineDecimator holding its full data
+        # Retained state of what is on screen, diffed by draw_curves()
+        self._drawn = {}         # Curve -> _DrawnCurve
+        self._axes_state = {}    # subplot index -> settings applied to it
+        self._legend_state = {}  # subplot index -> legend entries shown
+        self._curves = []        # curves of the last draw_curves()
+        # From this many curves, line-only curves are drawn as one
+        # LineCollection per axes (None: never)
+        self.batch_min_curves = 100
+        self._batched = False
+        self._batches = {}       # axes -> _LineBatch
+        self._syncing = False    # inside draw_curves()
+        # tight_layout() re-measuring only the subplots whose labels changed
+        self.layout_cache = TightLayoutCache(self.fig)
+        # Blitting: last full render, interactive overlays drawn on top of it
+        self._background = None  # (region, figure bbox bounds)
+        self._crosshair_on = False
+        self._overlays = []
+        # Background rendering (see draw_idle)
+        self.async_render = False
+        self._render_pool = None
+        self._render_gen = 0        # bumped by every new frame request
+        self._render_busy = False
+        self._render_queued = False
+        self._render_failed = False  # a background render raised (see _render_snapshot)
+        self._render_again = False
+        # Progressive resize: while resizing, show the last frame scaled
+        self.progressive_resize = True
+        self._resizing = False
+        self._ratio = None       # config.ratio of the last draw_curves()
+        self._inches = {}        # ratio_to_inches() memo
      #### Premiere fois, creer subplot par defaut et ov par defaut, ensuite xtickN change pas
         super().__init__(self.fig)
-        
+        self.mpl_connect("draw_event", self._on_draw_event)
+        self.mpl_connect("motion_notify_event", self._on_mouse_move)
+        self.mpl_connect("figure_leave_event", self._on_mouse_leave)
+        self.mpl_connect("button_press_event", self._on_mouse_press)
+        self._frame_ready.connect(self._on_frame_ready)
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.timeout.connect(self._end_resize)
+
     def clear(self, layout, config):
         need_rebuild = (
         self._last_layout != layout
@@ -31,12 +110,126 @@ class PlotCanvas(FigureCanvas):
         else:
             for ax in self.axes:
                 ax.clear()
+                ax.callbacks.connect("xlim_changed", self._on_xlim_changed)
             for ax2 in self.ax2.values():
                 ax2.remove()
             self.ax2.clear()
+        self._forget_drawn()
+
+    def _forget_drawn(self):
+        """Drop the retained state: the next draw_curves() re-plots everything."""
+        self._drawn.clear()
+        self._decimators.clear()
+        self._axes_state.clear()
+        self._legend_state.clear()
+        self._batches.clear()
+
+    def _sync_layout(self, layout, config):
+        """
+        Reshape the subplot grid when the layout / sharing changed.
+        Existing axes and their lines are kept; returns the axes to re-limit.
+        """
+        if (self._last_layout == layout
+                and self._last_shared_x == config.shared_x
+                and self._last_shared_y == config.shared_y):
+            return set()
+        if not self.axes or not self.reshape_in_place:
+            self.clear(layout, config)
+            return set()
+        try:
+            self._reshape_subplots(layout, config.shared_x, config.shared_y)
+        except Exception:
+            # Private matplotlib API changed: rebuild the figure from now on
+            log.warning("Reshaping subplots in place failed, rebuilding them instead",
+                        exc_info=True)
+            self.reshape_in_place = False
+            self.clear(layout, config)
+            return set()
+        self._last_layout = layout
+        self._last_shared_x = config.shared_x
+        self._last_shared_y = config.shared_y
+        return set(self.axes) | set(self.ax2.values())
+
+    def _reshape_subplots(self, layout, shared_x, shared_y):
+        """
+        Move the subplots to a new grid instead of fig.clear(): axes are
+        repositioned on a new GridSpec, the ones past the end go away (their
+        curves are re-placed by draw_curves) and shared axes are relinked.
+        """
+        rows, cols = layout
+        n = rows * cols
+        for i in range(n, len(self.axes)):
+            ax, ax2 = self.axes[i], self.ax2.pop(i, None)
+            for curve in [c for c, d in self._drawn.items() if d.axes in (ax, ax2)]:
+                self._remove_line(curve)
+            if ax2 is not None:
+                ax2.remove()
+            ax.remove()
+            self._legend_state.pop(i, None)
+        del self.axes[n:]
+
+        _reset_subplotpars(self.fig)  # as fig.clear() does: tight_layout starts over
+        gs = self.fig.add_gridspec(rows, cols)
+        for i in range(n):
+            if i < len(self.axes):
+                self.axes[i].set_subplotspec(gs[i])
+                if i in self.ax2:
+                    self.ax2[i].set_subplotspec(self.axes[i].get_subplotspec())
+            else:
+                ax = self.fig.add_subplot(gs[i])
+                ax.callbacks.connect("xlim_changed", self._on_xlim_changed)
+                self.axes.append(ax)
+
+        self._link_shared(rows, cols, shared_x, shared_y)
+        if shared_x:
+            self.fig.subplots_adjust(hspace=0)
+        self._axes_state.clear()
+
+    def _link_shared(self, rows, cols, shared_x, shared_y):
+        """
+        Link the axes like fig.subplots(sharex="col", sharey="row") would.
+        Uses matplotlib internals (Axes._shared_axes / _sharex / _sharey,
+        axis.Ticker, Axis._set_scale), checked with matplotlib 3.6.3, 3.8.4
+        and 3.11.2: _sync_layout() falls back to clear() if they fail.
+        """
+        # Unlink everything first (matplotlib has no unshare): each axes
+        # gets its own tick locators / formatters back
+        for ax in self.axes:
+            for name, axis in (("x", ax.xaxis), ("y", ax.yaxis)):
+                ax._shared_axes[name].remove(ax)
+                setattr(ax, "_share" + name, None)
+                axis.major, axis.minor = Ticker(), Ticker()
+                axis._set_scale(axis.get_scale())
+        for i, ax2 in self.ax2.items():
+            ax2._shared_axes["x"].remove(ax2)  # would still link the old group
+            ax2._sharex = None
+            ax2.sharex(self.axes[i])
+
+        for i, ax in enumerate(self.axes):
+            r, c = divmod(i, cols)
+            if shared_x and r > 0:
+                ax.sharex(self.axes[c])
+            if shared_y and c > 0:
+                ax.sharey(self.axes[r * cols])
+            # Inner tick labels off, as label_outer() does for shared subplots
+            inner_x = shared_x and r < rows - 1
+            inner_y = shared_y and c > 0
+            ax.xaxis.set_tick_params(which="both", labelbottom=not inner_x)
+            ax.xaxis.offsetText.set_visible(not inner_x)
+            ax.yaxis.set_tick_params(which="both", labelleft=not inner_y)
+            ax.yaxis.offsetText.set_visible(not inner_y)
 
 
     def ratio_to_inches(self, ratio):
+        key = (tuple(ratio), self.width(), self.height(), self.fig.get_dpi())
+        size = self._inches.get(key)
+        if size is None:
+            if len(self._inches) > 64:
+                self._inches.clear()
+            size = self._inches[key] = self._fit_ratio(ratio)
+        return size
+
+    def _fit_ratio(self, ratio):
         Max_x = self.width()/self.fig.get_dpi() 
         Max_y = self.height()/self.fig.get_dpi() 
        
@@ -50,151 +243,410 @@ class PlotCanvas(FigureCanvas):
         
 
     def draw_curves(self, curves, config):
+        """
+        Bring the figure in line with `curves` and `config`.
+        Retained mode: what is already drawn is diffed against the request and
+        only what changed is touched (line style / data, axis settings,
+        legends). The subplot grid is reshaped in place when the layout changes.
+        """
         print("Drawing")
-        # 1) Create/clear axes
-        self.clear(config.subplot_layout, config)   # your clear() handles fig.subplots + clearing
+        # Limits change many times below: re-decimate once, at the end
+        self._syncing = True
+        try:
+            self._sync_figure(curves, config)
+            for ax in self.axes + list(self.ax2.values()):
+                self._redecimate(ax)
+        finally:
+            self._syncing = False
+        self.draw_idle()
 
+    def _sync_figure(self, curves, config):
+        """draw_curves() minus the final re-decimation / redraw."""
+        # 1) Create / reshape the axes if the layout changed
+        relim = self._sync_layout(config.subplot_layout, config)
 
-        # 2) Plot curves in their subplot
-        for curve in curves:
-            i = int(curve.subplot_index)
-            i = max(0, min(i, len(self.axes) - 1))  # clamp
+        # 2) Remove the lines of curves that are gone
+        wanted = set(curves)
+        for curve in [c for c in self._drawn if c not in wanted]:
+            relim.add(self._remove_line(curve))
 
-            ax = self.axes[i]
+        batched = self.batch_min_curves is not None and len(curves) >= self.batch_min_curves
+        if batched != self._batched:
+            # Switching between Line2D and LineCollection drawing: re-plot all
+            for curve in list(self._drawn):
+                relim.add(self._remove_line(curve))
+            self._batched = batched
+        self._curves = list(curves)
 
-            if curve.axis == "secondary":
-                ax = self.ax2.setdefault(i, ax.twinx())
+        # 3) Add new curves, update the others in place
+        for curve in curves:
+            relim.update(self._sync_curve(curve))
 
-            x, y = curve.xy()
-            (line,) = ax.plot(
-                x, y,
-                label=curve.label,
-                color=curve.color,
-                marker=curve.marker,
-                markersize=curve.marker_size,
-                markerfacecolor=curve.marker_face_color,
-                markeredgecolor=curve.marker_edge_color,
-                linestyle=curve.linestyle,
-                linewidth=curve.linewidth,
-
-            )
-            curve._mpl_line = line
+        # Twin axes left without a curve go away
+        for i in [i for i, ax2 in self.ax2.items() if not self._has_curves(ax2)]:
+            relim.discard(self.ax2[i])
+            self.ax2.pop(i).remove()
+            relim.add(self.axes[i])  # its x range was shared with the twin
+
+        for ax in relim:
+            if ax is not None:
+                self._relim(ax)
 
-        # 3) Apply config to *each* subplot (and its secondary axis if present)
+        # 4) Apply config to the subplots whose settings changed
+        rows, cols = config.subplot_layout
         for i, ax in enumerate(self.axes):
-            ov = config.subplots_config.get(i, {})
-            rows, cols = config.subplot_layout
-            r, c = divmod(i, cols)
-            # shared_x rule: xlabel/xlim/xticks must be global
-            if config.shared_x:
-                if r == rows-1:  # bottom row
-                    ax.set_xlabel(ov.get("xlabel", config.xlabel))
-                else:
-                    ax.set_xlabel("")
-                    ax.tick_params(labelbottom=False)
-
-                # xlim = ov.get("xlim", config.xlimits) or config.xlimits
-                xtN  = ov.get("xticksN", config.xticksN) or config.xticksN
+            self._sync_axes_config(i, ax, config)
+            self._sync_legend(i, ax, curves, config)
+
+        # Size
+        self._ratio = config.ratio
+        w, h = self.ratio_to_inches(config.ratio)
+
+        if not np.allclose(self.fig.get_size_inches(), (w, h)):
+            self.fig.set_size_inches(w,h)
+
+        if config.dirty:
+            # tighter layout, but don't re-add vertical gaps when sharex
+            if config.shared_x and rows> 1:
+                # self.fig.tight_layout(h_pad=0.0)
+                self.fig.subplots_adjust(hspace=0)
             else:
-                ax.set_xlabel(ov.get("xlabel", config.xlabel))
+                self.layout_cache.tight_layout()
+            config.dirty = False
 
-                # xlim = ov.get("xlim", config.xlimits) or config.xlimits
-                xtN  = ov.get("xticksN", config.xticksN) or config.xticksN
-                
-            # y is per subplot (unless you later decide shared_y similar)
-            ax.set_ylabel(ov.get("ylabel", config.ylabel))
-            # ylim = ov.get("ylim", config.ylimits) or config.ylimits
-            ytN  = ov.get("yticksN", config.yticksN) or config.yticksN
+    # ------------------------------------------------------------------
+    # Retained curves
+    # ------------------------------------------------------------------
+    def _target_axes(self, curve):
+        i = int(curve.subplot_index)
+        i = max(0, min(i, len(self.axes) - 1))  # clamp
 
-            # if xlim is not None: ax.set_xlim(xlim)
-            # if ylim is not None: ax.set_ylim(ylim)
+        ax = self.axes[i]
 
-            if xtN is not None: ax.xaxis.set_major_locator(MaxNLocator(xtN))
-            if ytN is not None: ax.yaxis.set_major_locator(MaxNLocator(ytN))
+        if curve.axis == "secondary":
+            if i not in self.ax2:
+                self.ax2[i] = ax.twinx()
+                self.ax2[i].callbacks.connect("xlim_changed", self._on_xlim_changed)
+            ax = self.ax2[i]
+        return ax
 
-            # remove last tick label for subplots with shared x to avoid overlap
-            if rows > 1 and config.shared_x and r > 0:
-                yticks = ax.get_yticklabels()
+    @staticmethod
+    def _data_key(curve):
+        return (curve.x_data_file, curve.x_col, curve.y_data_file, curve.y_col,
+                getattr(curve, "decimation", "auto"), curve.marker)
 
-                if yticks:
-                    yticks[-1].set_visible(False)
+    @staticmethod
+    def _style(curve):
+        return {
+            "label": curve.label,
+            "color": curve.color,
+            "marker": curve.marker,
+            "markersize": curve.marker_size,
+            "markerfacecolor": curve.marker_face_color,
+            "markeredgecolor": curve.marker_edge_color,
+            "linestyle": curve.linestyle,
+            "linewidth": curve.linewidth,
+        }
 
-        # for i, ax in enumerate(self.axes):
-            ax2 = self.ax2.get(i)
+    def _sync_curve(self, curve):
+        """Plot or update one curve; returns the axes whose data limits changed."""
+        ax = self._target_axes(curve)
+        drawn = self._drawn.get(curve)
+        batched = self._batched and resolve_mode(None, curve.marker) != "lttb"  # no markers
+        if drawn is not None and (drawn.axes is not ax or (drawn.batch is not None) != batched):
+            # Moved to another subplot / axis: plot it again there
+            old_ax = self._remove_line(curve)
+            drawn = None
+        else:
+            old_ax = None
 
-            # # ---- Limits ----
-            # if config.xlimits is not None:
-            #     ax.set_xlim(config.xlimits)
-            # if config.ylimits is not None:
-            #     ax.set_ylim(config.ylimits)
-            #     if ax2 is not None:
-            #         ax2.set_ylim(config.ylimits)   # optional: separate secondary y-limits later
-
-
-            # # ---- Major tick count (auto-spaced) ----
-            # if config.xticksN is not None:
-            #     ax.xaxis.set_major_locator(MaxNLocator(nbins=config.xticksN))
-            # if config.yticksN is not None:
-            #     ax.yaxis.set_major_locator(MaxNLocator(nbins=config.yticksN))
-            #     if ax2 is not None:
-            #         ax2.yaxis.set_major_locator(MaxNLocator(nbins=config.yticksN))
-
-            # ---- Minor ticks ----
-            if config.minor_ticks:
-                ax.minorticks_on()
-                ax.xaxis.set_minor_locator(AutoMinorLocator())
-                ax.yaxis.set_minor_locator(AutoMinorLocator())
-                if ax2 is not None:
-                    ax2.minorticks_on()
-                    ax2.yaxis.set_minor_locator(AutoMinorLocator())
+        style = self._style(curve)
+        data_key = self._data_key(curve)
+
+        if drawn is None:
+            # Plot a decimated copy spanning the whole curve (same data limits);
+            # it is re-decimated to the final view once the layout is known
+            dec = self._make_decimator(curve)
+            view = dec.view(dec.full_xlim(), ax.bbox.width)
+            if batched:
+                # Proxy line: style + legend handle, drawn by the axes' batch
+                line = Line2D([], [], **style)
+                if curve.color is None:
+                    line.set_color(ax._get_lines.get_next_color())  # like ax.plot
+                batch = self._batches.get(ax)
+                if batch is None:
+                    batch = self._batches[ax] = _LineBatch(ax)
+                batch.add(line, view)
             else:
-                ax.minorticks_off()
-                if ax2 is not None:
-                    ax2.minorticks_off()
+                (line,) = ax.plot(*view, **style)
+                batch = None
+            self._decimators[line] = dec  # ax is re-limited from its full data
+            self._drawn[curve] = _DrawnCurve(line, data_key, style, batch)
+            curve._mpl_line = line
+            return {ax, old_ax}
 
-            # ---- Grid ----
-            ax.grid(config.grid, which="major")
+        line = drawn.line
+        changed = {k: v for k, v in style.items() if drawn.style.get(k) != v}
+        if changed:
+            _set_line_style(line, changed)
+            drawn.style = style
+            if drawn.batch is not None:
+                drawn.batch.stale = True
+        curve._mpl_line = line
 
-            if config.minor_grid:
-                ax.minorticks_on()
-                ax.grid(True, which="minor", linestyle=":", linewidth=0.5)
+        if drawn.data_key != data_key:
+            dec = self._decimators[line] = self._make_decimator(curve)
+            view = dec.view(dec.full_xlim(), ax.bbox.width)
+            if drawn.batch is not None:
+                drawn.batch.set_view(line, view)
             else:
-                ax.minorticks_off()
-                ax.grid(False, which="minor")
+                line.set_data(*view)
+            drawn.data_key = data_key
+            return {ax}
+        return set()
 
-            # Secondary grids usually look messy; keep them off by default
-            if ax2 is not None:
-                ax2.grid(False, which="both")
-
-            # ---- Legend ----
-            if config.legend:
-                h, l = ax.get_legend_handles_labels()
-                
-                if ax2 is not None:
-                    h2, l2 = ax2.get_legend_handles_labels()
-                    h += h2
-                    l += l2
-                
-                if h:
-                    legend = ax.legend(h, l)
-                    legend.set_draggable(True)
+    def _make_decimator(self, curve):
+        x, y = curve.xy()
+        dec = LineDecimator(x, y, getattr(curve, "decimation", "auto"), curve.marker,
+                            x_sorted=curve.x_data_file.column_is_sorted(curve.x_col))
+        if dec.wants_pyramid and len(x) == len(y):
+            dec.pyramid = curve.y_data_file.pyramid(curve.y_col)
+        return dec
 
-        # Size
-        w, h = self.ratio_to_inches(config.ratio)
+    def _remove_line(self, curve):
+        """Take a curve off the figure; returns the axes it was on."""
+        drawn = self._drawn.pop(curve)
+        ax = drawn.axes
+        self._decimators.pop(drawn.line, None)
+        if drawn.batch is not None:
+            drawn.batch.remove(drawn.line)
+            if not drawn.batch.handles:
+                drawn.batch.collection.remove()
+                del self._batches[ax]
+        else:
+            drawn.line.remove()
+        if curve._mpl_line is drawn.line:
+            curve._mpl_line = None
+        return ax
 
-        self.fig.set_size_inches(w,h)
+    def _has_curves(self, ax):
+        return bool(ax.lines) or ax in self._batches
 
-        if config.dirty:
-            # tighter layout, but don't re-add vertical gaps when sharex
-            if config.shared_x and rows> 1:
-                # self.fig.tight_layout(h_pad=0.0)
-                self.fig.subplots_adjust(hspace=0)
+    def _relim(self, ax):
+        """Recompute the data limits of ax from the full data of its lines and autoscale."""
+        if not self._has_curves(ax):
+            # Back to the limits of a freshly cleared axes (unless shared with data)
+            ax.relim()  # forget removed curves: shared siblings autoscale on it too
+            shared_x = any(self._has_curves(a) for a in ax.get_shared_x_axes().get_siblings(ax))
+            shared_y = any(self._has_curves(a) for a in ax.get_shared_y_axes().get_siblings(ax))
+            # (auto=None: don't turn autoscaling off on the shared siblings)
+            if not shared_x:
+                ax.set_xlim(0, 1, auto=None)
+            if not shared_y:
+                ax.set_ylim(0, 1, auto=None)
+            ax.set_autoscale_on(True)
+            if shared_x or shared_y:
+                ax.autoscale_view(scalex=shared_x, scaley=shared_y)
+            return
+        ax.relim()  # lines only: batches are counted through their decimators
+        batch = self._batches.get(ax)
+        corners = [self._decimators[line].data_corners()
+                   for line in ax.get_lines() + (batch.handles if batch else [])
+                   if line in self._decimators]
+        if corners:
+            ax.update_datalim(np.concatenate(corners))
+        ax.autoscale()
+
+    # ------------------------------------------------------------------
+    # Retained axes settings
+    # ------------------------------------------------------------------
+    def _sync_axes_config(self, i, ax, config):
+        ov = config.subplots_config.get(i, {})
+        rows, cols = config.subplot_layout
+        ax2 = self.ax2.get(i)
+        state = (
+            ov.get("xlabel", config.xlabel), ov.get("ylabel", config.ylabel),
+            ov.get("xticksN", config.xticksN) or config.xticksN,
+            ov.get("yticksN", config.yticksN) or config.yticksN,
+            config.shared_x, rows, cols,
+            config.minor_ticks, config.grid, config.minor_grid, ax2,
+        )
+        if self._axes_state.get(i) == state:
+            return
+        self._axes_state[i] = state
+
+        r, c = divmod(i, cols)
+        # shared_x rule: xlabel/xlim/xticks must be global
+        if config.shared_x:
+            if r == rows-1:  # bottom row
+                ax.set_xlabel(ov.get("xlabel", config.xlabel))
             else:
-                self.fig.tight_layout()
-            config.dirty = False
+                ax.set_xlabel("")
+                ax.tick_params(labelbottom=False)
 
-        self.draw_idle()
+            # xlim = ov.get("xlim", config.xlimits) or config.xlimits
+            xtN  = ov.get("xticksN", config.xticksN) or config.xticksN
+        else:
+            ax.set_xlabel(ov.get("xlabel", config.xlabel))
+
+            # xlim = ov.get("xlim", config.xlimits) or config.xlimits
+            xtN  = ov.get("xticksN", config.xticksN) or config.xticksN
+            
+        # y is per subplot (unless you later decide shared_y similar)
+        ax.set_ylabel(ov.get("ylabel", config.ylabel))
+        # ylim = ov.get("ylim", config.ylimits) or config.ylimits
+        ytN  = ov.get("yticksN", config.yticksN) or config.yticksN
+
+        # if xlim is not None: ax.set_xlim(xlim)
+        # if ylim is not None: ax.set_ylim(ylim)
+
+        ax.xaxis.set_major_locator(MaxNLocator(xtN) if xtN is not None else AutoLocator())
+        ax.yaxis.set_major_locator(MaxNLocator(ytN) if ytN is not None else AutoLocator())
+
+        # remove last tick label for subplots with shared x to avoid overlap
+        for tick in ax.yaxis.majorTicks:  # the axes may have been reshaped
+            tick.label1.set_visible(True)
+        if rows > 1 and config.shared_x and r > 0:
+            yticks = ax.get_yticklabels()
+
+            if yticks:
+                yticks[-1].set_visible(False)
 
+        # # ---- Limits ----
+        # if config.xlimits is not None:
+        #     ax.set_xlim(config.xlimits)
+        # if config.ylimits is not None:
+        #     ax.set_ylim(config.ylimits)
+        #     if ax2 is not None:
+        #         ax2.set_ylim(config.ylimits)   # optional: separate secondary y-limits later
+
+
+        # # ---- Major tick count (auto-spaced) ----
+        # if config.xticksN is not None:
+        #     ax.xaxis.set_major_locator(MaxNLocator(nbins=config.xticksN))
+        # if config.yticksN is not None:
+        #     ax.yaxis.set_major_locator(MaxNLocator(nbins=config.yticksN))
+        #     if ax2 is not None:
+        #         ax2.yaxis.set_major_locator(MaxNLocator(nbins=config.yticksN))
+
+        # ---- Minor ticks ----
+        if config.minor_ticks:
+            ax.minorticks_on()
+            ax.xaxis.set_minor_locator(AutoMinorLocator())
+            ax.yaxis.set_minor_locator(AutoMinorLocator())
+            if ax2 is not None:
+                ax2.minorticks_on()
+                ax2.yaxis.set_minor_locator(AutoMinorLocator())
+        else:
+            ax.minorticks_off()
+            if ax2 is not None:
+                ax2.minorticks_off()
+
+        # ---- Grid ----
+        ax.grid(config.grid, which="major")
+
+        if config.minor_grid:
+            ax.minorticks_on()
+            ax.grid(True, which="minor", linestyle=":", linewidth=0.5)
+        else:
+            ax.minorticks_off()
+            ax.grid(False, which="minor")
+
+        # Secondary grids usually look messy; keep them off by default
+        if ax2 is not None:
+            ax2.grid(False, which="both")
+
+    def _sync_legend(self, i, ax, curves, config):
+        """Rebuild the legend of subplot i only when its entries changed."""
+        entries = []
+        if config.legend:
+            ax2 = self.ax2.get(i)
+            # Primary curves first, then the secondary ones (like get_legend_handles_labels)
+            for target in (ax, ax2):
+                if target is None:
+                    continue
+                for curve in curves:
+                    drawn = self._drawn.get(curve)
+                    if (drawn is not None and drawn.axes is target
+                            and not str(curve.label).startswith("_")):
+                        entries.append((drawn.line, tuple(sorted(drawn.style.items(), key=str))))
+
+        owner = self._legend_axes(i)
+        if self._legend_state.get(i) == entries and (owner.get_legend() is not None) == bool(entries):
+            return
+        self._legend_state[i] = entries
+
+        self._remove_legends(i)
+        if entries:
+            h = [line for line, _ in entries]
+            legend = owner.legend(h, [line.get_label() for line in h])
+            legend.set_draggable(True, use_blit=True)
+
+    def _legend_axes(self, i):
+        """
+        Axes holding the legend of subplot i: the twin when there is one, as
+        it is on top and gets the mouse events (picking / dragging).
+        """
+        return self.ax2.get(i) or self.axes[i]
+
+    def _remove_legends(self, i):
+        for a in (self.axes[i], self.ax2.get(i)):
+            if a is not None and a.get_legend() is not None:
+                a.get_legend().remove()
+
+    def update_curve_data(self, updates):
+        """
+        Follow mode: push grown data into the already drawn lines, without
+        rebuilding the figure. `updates` is [(curve, n_new_points)]; only the
+        new points extend the data limits (a full relim when all are new).
+        """
+        touched = set()
+        relim = set()
+        for curve, n in updates:
+            drawn = self._drawn.get(curve)
+            dec = drawn and self._decimators.get(drawn.line)
+            if dec is None or drawn.axes is None:
+                continue
+            x, y = curve.xy()
+            dec.extend(x, y, n)
+            ax = drawn.axes
+            if n >= len(x):
+                relim.add(ax)
+            elif n > 0:
+                ax.update_datalim(np.column_stack((x[-n:], y[-n:])))
+            touched.add(ax)
+
+        for ax in relim:
+            self._relim(ax)
+        for ax in touched:
+            ax.autoscale_view()
+            self._redecimate(ax)
+        if touched:
+            self.draw_idle()
+
+    # ------------------------------------------------------------------
+    # Decimation (see Decimation.py)
+    # ------------------------------------------------------------------
+    def _on_xlim_changed(self, ax):
+        """Zoom / pan: re-fetch the visible part of every line sharing this x axis."""
+        if self._syncing:
+            return
+        for other in ax.get_shared_x_axes().get_siblings(ax):
+            self._redecimate(other)
+
+    def _redecimate(self, ax):
+        xlim = ax.get_xlim()
+        width = ax.bbox.width
+        transform = ax.xaxis.get_transform()
+        for line in ax.get_lines():
+            dec = self._decimators.get(line)
+            if dec is not None:
+                line.set_data(*dec.view(xlim, width, transform))
+        batch = self._batches.get(ax)
+        if batch is not None:
+            for line in batch.handles:
+                batch.set_view(line, self._decimators[line].view(xlim, width, transform))
+            batch.sync()
 
     # def _get_axis(self, axis):
 
@@ -211,6 +663,7 @@ class PlotCanvas(FigureCanvas):
         rows, cols = layout
 
         self.fig.clear()
+        _reset_subplotpars(self.fig)  # older matplotlib keeps them (hspace=0 of shared x)
         sharex = "col" if shared_x else False
         sharey = "row" if shared_y else False
         axs = self.fig.subplots(rows, cols, sharex=sharex, sharey=sharey)
@@ -221,27 +674,351 @@ class PlotCanvas(FigureCanvas):
         # flatten → axs[0], axs[1], ...
         self.axes = list(axs.flat) if hasattr(axs, "flat") else [axs]
         self.ax2.clear()
+        for ax in self.axes:
+            ax.callbacks.connect("xlim_changed", self._on_xlim_changed)
 
     def refresh_legends(self, config):
         """Rebuild legends from the *current* artists without replotting curves."""
+        self._legend_state.clear()
         for i, ax in enumerate(self.axes):
-            # Remove existing legend if any
-            old = ax.get_legend()
-            if old is not None:
-                old.remove()
+            self._sync_legend(i, ax, self._curves, config)
 
-            if not config.legend:
-                continue
+    # ------------------------------------------------------------------
+    # Blitting (interactive overlays)
+    # ------------------------------------------------------------------
+    # Overlays (crosshair + coordinates) are animated artists that are not
+    # part of the figure: moving them restores the cached last full render
+    # and draws only them, whatever the number of points on screen.
+    # Legends are dragged the same way (set_draggable(use_blit=True)).
+    def set_crosshair(self, enabled):
+        """Show a crosshair and the data coordinates under the mouse."""
+        self._crosshair_on = bool(enabled)
+        if not self._overlays:
+            self._make_overlays()
+        if not enabled:
+            self._hide_overlays()
 
-            h, l = ax.get_legend_handles_labels()
+    def _make_overlays(self):
+        style = dict(color="0.3", linewidth=0.8, linestyle="--", animated=True)
+        self._cross_v = Line2D([], [], transform=IdentityTransform(), **style)
+        self._cross_h = Line2D([], [], transform=IdentityTransform(), **style)
+        self._cross_text = Text(0, 0, "", transform=IdentityTransform(), animated=True,
+                                ha="right", va="top", fontsize="small",
+                                bbox=dict(boxstyle="round", fc="white", ec="0.7", alpha=0.85))
+        self._overlays = [self._cross_v, self._cross_h, self._cross_text]
+        for a in self._overlays:
+            a.set_figure(self.fig)  # drawn by us only: never in the figure's children
+            a.set_visible(False)
+
+    def _host_axes(self, ax):
+        """Subplot owning ax (twin axes map to their host), or None."""
+        if ax in self.axes:
+            return ax
+        for i, ax2 in self.ax2.items():
+            if ax2 is ax:
+                return self.axes[i]
+        return None
+
+    def _on_mouse_move(self, event):
+        if not self._crosshair_on or event.button is not None:
+            return  # dragging (legend, pan, zoom box): they blit / draw themselves
+        host = self._host_axes(event.inaxes)
+        if host is None or event.xdata is None:
+            self._hide_overlays()
+            return
+        bb = host.bbox
+        self._cross_v.set_data([event.x, event.x], [bb.y0, bb.y1])
+        self._cross_h.set_data([bb.x0, bb.x1], [event.y, event.y])
+        self._cross_text.set_position((bb.x1 - 4, bb.y1 - 4))
+        self._cross_text.set_text(event.inaxes.format_coord(event.xdata, event.ydata))
+        for a in self._overlays:
+            a.set_visible(True)
+        self._blit_overlays()
+
+    def _on_mouse_leave(self, event):
+        self._hide_overlays()
+
+    def _on_mouse_press(self, event):
+        # Keep the crosshair out of the renders / backgrounds of the drag
+        for a in self._overlays:
+            a.set_visible(False)
+
+    def _hide_overlays(self):
+        if any(a.get_visible() for a in self._overlays):
+            for a in self._overlays:
+                a.set_visible(False)
+            self._blit_overlays()
+
+    def _on_draw_event(self, event):
+        """A full render just finished: it is the new static background."""
+        self._background = (self.copy_from_bbox(self.fig.bbox), self.fig.bbox.bounds)
+        self._draw_overlays()
+
+    def _draw_overlays(self):
+        for a in self._overlays:
+            if a.get_visible():
+                self.fig.draw_artist(a)
+
+    def _blit_overlays(self):
+        if self._background is None:
+            return
+        region, bounds = self._background
+        if bounds != self.fig.bbox.bounds:
+            # Resized: the cached render is outdated, a full one is due
+            self.draw_idle()
+            return
+        self.restore_region(region)
+        self._draw_overlays()
+        self.blit(self.fig.bbox)
+
+
+    # ------------------------------------------------------------------
+    # Progressive resize
+    # ------------------------------------------------------------------
+    # Qt sends a resize event per mouse move while the window is resized.
+    # Instead of re-rendering the figure for each of them, the last frame
+    # is shown scaled to the size it will get; once the size has settled
+    # for 150 ms, resize_settled asks for one full render, unless the
+    # figure keeps the same size (ratio-bound), then the frame is reused.
+    def set_progressive_resize(self, enabled):
+        self.progressive_resize = bool(enabled)
+
+    def resizeEvent(self, event):
+        if self.progressive_resize and hasattr(self, "renderer"):
+            QWidget.resizeEvent(self, event)
+            self._resizing = True
+            self._hide_overlays()
+            self.update()
+        else:
+            super().resizeEvent(event)  # figure follows the widget, redrawn now
+        self._resize_timer.start(150)
+
+    def _end_resize(self):
+        was_resizing, self._resizing = self._resizing, False
+        if self._ratio is None:
+            if was_resizing:
+                # Nothing plotted yet: the figure just follows the widget
+                super().resizeEvent(QResizeEvent(self.size(), self.size()))
+            return
+        if np.allclose(self.fig.get_size_inches(), self.ratio_to_inches(self._ratio)):
+            self.update()  # same figure size: the last frame is still right
+            return
+        self.resize_settled.emit()
+
+    def paintEvent(self, event):
+        if not self._resizing:
+            super().paintEvent(event)
+            return
+        # Last frame, scaled like the figure will be (same aspect, fit in the widget)
+        buf = memoryview(self.renderer.buffer_rgba())
+        h, w = buf.shape[:2]
+        image = QImage(buf, w, h, QImage.Format_RGBA8888)
+        w, h = w / self.device_pixel_ratio, h / self.device_pixel_ratio
+        scale = min(self.width() / w, self.height() / h)
+        painter = QPainter(self)
+        try:
+            painter.eraseRect(self.rect())
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawImage(QRectF(0, 0, w * scale, h * scale), image)
+        finally:
+            painter.end()
+
+    # ------------------------------------------------------------------
+    # Background rendering
+    # ------------------------------------------------------------------
+    # With async_render on, draw_idle() renders a pickled snapshot of the
+    # figure on a worker thread while the previous frame stays on screen;
+    # the finished renderer is swapped in on the GUI thread. A newer request
+    # cancels the frame in flight. draw() (legend picking, savefig...) and
+    # renders after a resize stay synchronous.
+    def set_async_render(self, enabled):
+        self.async_render = bool(enabled)
+
+    def draw_idle(self):
+        if not self.async_render or not self._renderer_matches():
+            super().draw_idle()
+            return
+        if not self._render_queued:
+            # Coalesce the requests of this event-loop turn
+            self._render_queued = True
+            QTimer.singleShot(0, self._start_render)
+
+    def _renderer_matches(self, renderer=None):
+        """True if renderer (default: the current one) fits the canvas size / dpi."""
+        renderer = renderer or getattr(self, "renderer", None)
+        w, h = self.get_width_height(physical=True)
+        return renderer is not None and (renderer.width, renderer.height, renderer.dpi) == (w, h, self.fig.dpi)
+
+    def _start_render(self):
+        self._render_queued = False
+        self._render_gen += 1   # the frame in flight (if any) is stale now
+        if self._render_busy:
+            self._render_again = True
+            return
+        if not self._renderer_matches():
+            super().draw_idle()
+            return
+        for ax in self.fig.axes:
+            _ = ax.viewLim  # apply pending autoscaling here, not on the copy
+        snapshot = _snapshot(self.fig)
+        if self._render_pool is None:
+            self._render_pool = ThreadPoolExecutor(max_workers=1)
+        self._render_busy = True
+        self._render_pool.submit(self._render_snapshot, snapshot, self.fig.dpi, self._render_gen)
+
+    def _render_snapshot(self, snapshot, dpi, gen):
+        """Worker thread: render the figure copy; never touches the live figure."""
+        renderer = None
+        try:
+            fig = _restore(snapshot)
+            fig.set_dpi(dpi)  # unpickling restores the dpi without the screen scaling
+            canvas = FigureCanvasAgg(fig)
+            _cancel_when(canvas.get_renderer(), lambda: gen != self._render_gen)
+            canvas.draw()
+            renderer = canvas.get_renderer()
+        except _RenderCancelled:
+            pass
+        except Exception:
+            # Logged with its traceback once per canvas, then at debug level
+            level = logging.DEBUG if self._render_failed else logging.WARNING
+            self._render_failed = True
+            log.log(level, "Background render failed", exc_info=True)
+        self._frame_ready.emit((gen, renderer))
+
+    def _on_frame_ready(self, result):
+        gen, renderer = result
+        self._render_busy = False
+        if renderer is not None and gen == self._render_gen and self._renderer_matches(renderer):
+            self.renderer = renderer
+            DrawEvent("draw_event", self, renderer)._process()
+            self.update()
+        if self._render_again:
+            self._render_again = False
+            self._start_render()
+
+
+class _RenderCancelled(Exception):
+    pass
+
+
+class _SnapshotPickler(pickle.Pickler):
+    # Large arrays (line data) are passed by reference instead of copied:
+    # the live figure replaces them on updates (set_data), never mutates them
+    def __init__(self, f):
+        super().__init__(f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.arrays = []
+
+    def persistent_id(self, obj):
+        if isinstance(obj, np.ndarray) and obj.nbytes >= 1 << 16:
+            self.arrays.append(obj)
+            return len(self.arrays) - 1
+        return None
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, f, arrays):
+        super().__init__(f)
+        self.arrays = arrays
+
+    def persistent_load(self, pid):
+        return self.arrays[pid]
+
+
+def _snapshot(fig):
+    """Copy of the figure state that a worker thread can render on its own."""
+    f = io.BytesIO()
+    p = _SnapshotPickler(f)
+    p.dump(fig)
+    return f.getvalue(), p.arrays
+
+
+def _restore(snapshot):
+    data, arrays = snapshot
+    return _SnapshotUnpickler(io.BytesIO(data), arrays).load()
+
+
+def _cancel_when(renderer, stale):
+    """Make renderer's drawing calls raise _RenderCancelled once stale() is true."""
+    def checked(draw):
+        def wrapper(*args, **kwargs):
+            if stale():
+                raise _RenderCancelled()
+            return draw(*args, **kwargs)
+        return wrapper
+    for name in ("draw_path", "draw_markers", "draw_path_collection", "draw_image", "draw_text"):
+        setattr(renderer, name, checked(getattr(renderer, name)))
+
+
+class _DrawnCurve:
+    """
+    What draw_curves() last applied to the Line2D of one curve. For a
+    batched curve, `line` is a proxy outside the axes and `batch` draws it.
+    """
+    def __init__(self, line, data_key, style, batch=None):
+        self.line = line
+        self.data_key = data_key
+        self.style = style
+        self.batch = batch
+
+    @property
+    def axes(self):
+        return self.batch.ax if self.batch is not None else self.line.axes
+
+
+class _LineBatch:
+    """
+    Line-only curves of one axes drawn as a single LineCollection: one
+    artist to draw instead of one per curve. Each curve is a proxy Line2D
+    (not in the axes) holding its style; sync() pushes segments and the
+    per-curve colors / widths / dashes to the collection.
+    """
+    def __init__(self, ax):
+        self.ax = ax
+        self.handles = []   # proxies, in drawing order
+        self.views = {}     # proxy -> (x, y) drawn
+        self.collection = LineCollection(
+            [], capstyle=rcParams["lines.solid_capstyle"],
+            joinstyle=rcParams["lines.solid_joinstyle"])
+        ax.add_collection(self.collection, autolim=False)
+        self.stale = True
+
+    def add(self, line, view):
+        self.handles.append(line)
+        self.views[line] = view
+        self.stale = True
+
+    def remove(self, line):
+        self.handles.remove(line)
+        del self.views[line]
+        self.stale = True
+
+    def set_view(self, line, view):
+        if self.views.get(line) is not view:
+            self.views[line] = view
+            self.stale = True
+
+    def sync(self):
+        if not self.stale:
+            return
+        self.stale = False
+        lines = self.handles
+        self.collection.set_segments([np.column_stack(self.views[l]) for l in lines])
+        self.collection.set_color([l.get_color() for l in lines])
+        self.collection.set_linestyle([l.get_linestyle() for l in lines])
+        # linestyle "None": hidden, as for a Line2D (a collection would draw it solid)
+        self.collection.set_linewidth([0 if l.get_linestyle() in ("None", "none", "", " ") else l.get_linewidth()
+                                       for l in lines])
 
-            ax2 = self.ax2.get(i)
-            if ax2 is not None:
-                h2, l2 = ax2.get_legend_handles_labels()
-                h += h2
-                l += l2
 
-            if h:
-                leg = ax.legend(h, l)
-                leg.set_draggable(True)
+# Line2D style arguments whose None means "the rcParams default"
+_RC_DEFAULTS = {"markersize": "lines.markersize", "linewidth": "lines.linewidth"}
 
+def _set_line_style(line, changed):
+    """Apply changed plot() style kwargs to an existing Line2D."""
+    for key, value in changed.items():
+        if value is None:
+            if key in _RC_DEFAULTS:
+                value = rcParams[_RC_DEFAULTS[key]]
+            elif key == "color":
+                continue    # keep the color the axes cycle gave it
+        line.set(**{key: value})
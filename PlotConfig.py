@@ -1,4 +1,26 @@
-class PlotConfig:
+from ChangeModel import Dirty, Observable
+
+
+class PlotConfig(Observable):
+    # What an attribute write invalidates (see ChangeModel)
+    _CHANGES = {
+        "xlabel": Dirty.LABEL, "ylabel": Dirty.LABEL,
+        "grid": Dirty.AXES, "minor_grid": Dirty.AXES, "minor_ticks": Dirty.AXES,
+        "xticksN": Dirty.AXES, "yticksN": Dirty.AXES,
+        "legend": Dirty.LEGEND,
+        "palette_name": Dirty.NONE,
+        "dirty": Dirty.NONE,   # tight_layout request, handled by PlotCanvas
+        "xlimits": Dirty.LIMITS, "ylimits": Dirty.LIMITS,
+        "ratio": Dirty.LAYOUT, "subplots": Dirty.LAYOUT, "subplot_layout": Dirty.LAYOUT,
+        "shared_x": Dirty.LAYOUT, "shared_y": Dirty.LAYOUT,
+        # subplots_config[i][key]
+        "subplots_config": Dirty.LABEL | Dirty.LIMITS | Dirty.AXES,
+        ("subplots_config", "xlabel"): Dirty.LABEL, ("subplots_config", "ylabel"): Dirty.LABEL,
+        ("subplots_config", "xlim"): Dirty.LIMITS, ("subplots_config", "ylim"): Dirty.LIMITS,
+        ("subplots_config", "xticksN"): Dirty.AXES, ("subplots_config", "yticksN"): Dirty.AXES,
+    }
+    _TRACKED_DICTS = ("subplots_config",)
+
     def __init__(self):
         self.xlabel = "X"
         self.ylabel = "Y"
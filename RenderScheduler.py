@@ -0,0 +1,75 @@
+"""
+RenderScheduler.py
+
+Coalesces redraw requests coming from anywhere (UI handlers, model change
+notifications, timers) into at most one render per event-loop turn.
+
+A request only arms a single-shot timer; every request arriving before it
+fires is merged into the same render. Renders are also kept at least
+`frame_ms` apart, so a burst of edits (typing, spin boxes, follow mode)
+costs one render per frame instead of one per event.
+
+Without a running Qt application nothing would fire the timer: requests
+then stay pending until flush() (AppController.update_plot()).
+"""
+
+import time
+
+from PyQt5.QtCore import QCoreApplication, QTimer
+
+
+class RenderScheduler:
+    def __init__(self, render, frame_ms=16):
+        """render(force) does the actual drawing; returns True if it drew something."""
+        self._render = render
+        self.frame_ms = frame_ms
+        self._timer = None
+        self._pending = False
+        self._force = False
+        self._last_render = None    # time.perf_counter() of the last render
+
+        # Counters (see stats())
+        self.requests = 0   # request() calls
+        self.merged = 0     # requests served by a render already pending
+        self.renders = 0    # renders that actually drew
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def request(self, force=False):
+        """Ask for a render on the next event-loop turn (or next frame)."""
+        self.requests += 1
+        self._force = self._force or force
+        if self._pending:
+            self.merged += 1
+            return
+        self._pending = True
+        if QCoreApplication.instance() is None:
+            return
+        if self._timer is None:
+            self._timer = QTimer()
+            self._timer.setSingleShot(True)
+            self._timer.timeout.connect(self.flush)
+        delay = 0
+        if self._last_render is not None:
+            since_ms = (time.perf_counter() - self._last_render) * 1000.0
+            delay = max(0, int(self.frame_ms - since_ms))
+        self._timer.start(delay)
+
+    def flush(self, force=False):
+        """Render now: pending requests are served by this render."""
+        if self._timer is not None:
+            self._timer.stop()
+        force = force or self._force
+        self._pending = False
+        self._force = False
+        if self._render(force):
+            self.renders += 1
+            self._last_render = time.perf_counter()
+
+    def stats(self):
+        return {"requests": self.requests, "renders": self.renders, "merged": self.merged}
+
+    def reset_stats(self):
+        self.requests = self.merged = self.renders = 0
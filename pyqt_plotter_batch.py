@@ -0,0 +1,234 @@
+"""
+pyqt_plotter_batch.py
+
+Headless rendering of saved projects (.pproj) to PNG / SVG / PDF files:
+
+    python pyqt_plotter_batch.py reports/*.pproj -o figures -f png pdf --dpi 200
+
+Each project is loaded through AppController.load_project into an offscreen
+PlotCanvas (never shown, Agg rendering only) and saved with savefig. Projects
+are rendered in parallel by a process pool.
+
+Data files are shared between projects referencing the same paths: every
+distinct file is parsed once into the on-disk cache (see DataCache) before
+rendering starts, then the workers open the memory-mapped cache entries, so
+the OS keeps one copy of the pages for all processes. Within a worker, the
+DataFiles of a project are kept until the next project is open: the files
+both use are shared through the DataRegistry, the others are released.
+"""
+
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")  # no display needed
+
+import argparse
+import glob
+import json
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from PyQt5.QtCore import QEvent
+from PyQt5.QtWidgets import QApplication
+
+from AppController import AppController, resolve_data_path
+from DataCache import load_data_file_cached
+from PlotCanvas import PlotCanvas
+
+FORMATS = ("png", "svg", "pdf")
+
+
+# ----------------------------------------------------------------------
+# Offscreen canvas / controller
+# ----------------------------------------------------------------------
+class OffscreenCanvas(PlotCanvas):
+    """PlotCanvas that is never shown: the figure fits in size_inches instead of the widget."""
+    def __init__(self, size_inches=(8.0, 6.0), dpi=100):
+        super().__init__()
+        self.size_inches = tuple(size_inches)
+        # Lines are decimated for the pixels of the exported file
+        self.fig.set_dpi(dpi)
+
+    def _fit_ratio(self, ratio):
+        max_w, max_h = self.size_inches
+        scale = min(max_w / ratio[0], max_h / ratio[1])
+        return ratio[0] * scale, ratio[1] * scale
+
+    def draw_idle(self):
+        pass    # savefig() draws
+
+
+# DataFiles of the last project rendered by this process: kept alive so
+# that the next project shares them (see DataRegistry)
+_previous_files = []
+
+
+class BatchController(AppController):
+    """AppController opening the memory-mapped cache entries of the data files."""
+    def __init__(self, canvas):
+        super().__init__(canvas)
+        self.mmap_data_files = True
+        self.parse_workers = 1      # the projects are already rendered in parallel
+
+
+# ----------------------------------------------------------------------
+# Rendering
+# ----------------------------------------------------------------------
+def _app():
+    return QApplication.instance() or QApplication(["pyqt_plotter_batch"])
+
+
+def output_paths(project, out_dir, formats):
+    stem = os.path.splitext(os.path.basename(project))[0]
+    out_dir = out_dir or os.path.dirname(os.path.abspath(project))
+    return [os.path.join(out_dir, stem + "." + fmt) for fmt in formats]
+
+
+def render_project(project, out_dir=None, formats=("png",), dpi=150,
+                   size_inches=(8.0, 6.0), data_dir=None):
+    """
+    Render one project to out_dir (default: next to the project).
+    Returns (saved paths, missing data files as (key, path)).
+    """
+    global _previous_files
+    app = _app()
+    canvas = OffscreenCanvas(size_inches, dpi)
+    try:
+        controller = BatchController(canvas)
+        missing = controller.load_project(project, data_dir=data_dir)
+        _previous_files = list(controller.data_files.values())
+        config = controller.config
+        rows, _ = config.subplot_layout
+        if not (config.shared_x and rows > 1):
+            # The project limits were applied after the layout: lay out
+            # again for the tick labels actually shown
+            canvas.layout_cache.tight_layout()
+        saved = []
+        for path, fmt in zip(output_paths(project, out_dir, formats), formats):
+            canvas.fig.savefig(path, format=fmt, dpi=dpi)
+            saved.append(path)
+        return saved, missing
+    finally:
+        canvas.deleteLater()
+        app.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+def _render_job(job):
+    """Pool task: never raises, so that one broken project does not stop the batch."""
+    project, kwargs = job
+    t0 = time.perf_counter()
+    try:
+        saved, missing = render_project(project, **kwargs)
+        return project, saved, missing, None, time.perf_counter() - t0
+    except Exception:
+        return project, [], [], traceback.format_exc(), time.perf_counter() - t0
+
+
+def _prewarm(path):
+    """Pool task: parse a data file into the on-disk cache (no-op if already there)."""
+    try:
+        load_data_file_cached(path, workers=1)
+        return path, None
+    except Exception as e:
+        return path, f"{type(e).__name__}: {e}"
+
+
+def project_data_files(project, data_dir=None):
+    """Resolved paths of the data files a project references (existing ones only)."""
+    try:
+        with open(project, "r", encoding="utf-8") as f:
+            files = json.load(f).get("data_files", {})
+    except (OSError, ValueError):
+        return ()   # reported when rendering
+    paths = (resolve_data_path(p, data_dir) for p in files.values())
+    return tuple(sorted(os.path.realpath(p) for p in paths if os.path.exists(p)))
+
+
+def render_projects(projects, out_dir=None, formats=("png",), dpi=150,
+                    size_inches=(8.0, 6.0), data_dir=None, workers=None):
+    """
+    Render many projects in parallel. Yields the _render_job() results
+    (project, saved, missing, error, seconds) as projects complete.
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    kwargs = dict(out_dir=out_dir, formats=tuple(formats), dpi=dpi,
+                  size_inches=tuple(size_inches), data_dir=data_dir)
+
+    # Projects using the same data files next to each other: they tend to
+    # land in the same worker (chunks), which then opens the files once
+    data = {p: project_data_files(p, data_dir) for p in projects}
+    projects = sorted(projects, key=lambda p: (data[p], p))
+    unique = sorted({path for paths in data.values() for path in paths})
+    jobs = [(p, kwargs) for p in projects]
+
+    if workers == 1 or len(projects) == 1:
+        for path, err in map(_prewarm, unique):
+            if err:
+                print(f"Could not parse {path}: {err}")
+        for job in jobs:
+            yield _render_job(job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # 1) Parse every distinct data file once
+        for path, err in pool.map(_prewarm, unique):
+            if err:
+                print(f"Could not parse {path}: {err}")
+        # 2) Render: the workers open the memory-mapped cache entries
+        chunksize = max(1, len(jobs) // (workers * 4))
+        yield from pool.map(_render_job, jobs, chunksize=chunksize)
+
+
+# ----------------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------------
+def expand_projects(args):
+    """Project files from paths, glob patterns and directories (all their .pproj)."""
+    projects = []
+    for arg in args:
+        if os.path.isdir(arg):
+            projects += sorted(glob.glob(os.path.join(arg, "*.pproj")))
+        elif glob.has_magic(arg):
+            projects += sorted(glob.glob(arg))
+        else:
+            projects.append(arg)
+    seen = set()
+    return [p for p in projects if not (os.path.abspath(p) in seen or seen.add(os.path.abspath(p)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render .pproj projects to image files without a display.")
+    parser.add_argument("projects", nargs="+", help="project files, glob patterns or directories")
+    parser.add_argument("-o", "--out-dir", help="output directory (default: next to each project)")
+    parser.add_argument("-f", "--format", nargs="+", default=["png"], choices=FORMATS, dest="formats")
+    parser.add_argument("--dpi", type=float, default=150)
+    parser.add_argument("--size", type=float, nargs=2, default=(8.0, 6.0), metavar=("W", "H"),
+                        help="box the figure is fitted in, keeping the project ratio (inches)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--data-dir", help="where to look for data files missing at their saved path")
+    args = parser.parse_args(argv)
+
+    projects = expand_projects(args.projects)
+    if not projects:
+        parser.error("no project found")
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    t0 = time.perf_counter()
+    failed = 0
+    results = render_projects(projects, args.out_dir, args.formats, args.dpi, args.size,
+                              args.data_dir, args.workers)
+    for n, (project, saved, missing, error, seconds) in enumerate(results, 1):
+        if error:
+            failed += 1
+            print(f"[{n}/{len(projects)}] FAILED {project}\n{error}")
+            continue
+        print(f"[{n}/{len(projects)}] {project} ({seconds:.2f} s)")
+        for key, path in missing:
+            print(f"    missing data file {key}: {path}")
+    print(f"{len(projects) - failed} rendered, {failed} failed in {time.perf_counter() - t0:.1f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
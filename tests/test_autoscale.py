@@ -0,0 +1,38 @@
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from Curves import Curve
+from DataFile import DataFile
+from Decimation import LineDecimator
+from PlotCanvas import PlotCanvas
+from PlotConfig import PlotConfig
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def test_undecimated_corners_span_the_data():
+    x = np.array([50.0, 0.0, 100.0, 20.0])
+    dec = LineDecimator(x, np.array([1.0, -2.0, 3.0, np.nan]))
+    assert dec.mode == "none"
+    np.testing.assert_array_equal(dec.data_corners(), [[0.0, -2.0], [100.0, 3.0]])
+
+
+def test_batched_unsorted_curve_is_autoscaled(app):
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, 50, 200)
+    df = DataFile("f", ["t", "u", "y"],
+                  np.column_stack((t, rng.permutation(np.linspace(0, 100, 200)), np.sin(t))))
+    curves = [Curve("f", df, "t", "y", name="sorted"),
+              Curve("f", df, "u", "y", name="unsorted")]
+    canvas = PlotCanvas()
+    canvas.batch_min_curves = 2
+    canvas.draw_curves(curves, PlotConfig())
+    xmin, xmax = canvas.axes[0].get_xlim()
+    assert xmin <= 0 and xmax >= 100
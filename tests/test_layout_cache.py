@@ -0,0 +1,37 @@
+import numpy as np
+from matplotlib.figure import Figure
+
+import LayoutCache
+from LayoutCache import TightLayoutCache
+
+
+def _figure():
+    fig = Figure(figsize=(6, 4))
+    for i, ax in enumerate(fig.subplots(2, 1)):
+        ax.plot(np.arange(10) * 10 ** (3 * i))
+        ax.set_ylabel("y%d" % i)
+    return fig
+
+
+def test_cached_layout_matches_tight_layout():
+    fig = _figure()
+    fig.tight_layout()
+    expected = vars(fig.subplotpars).copy()
+    fig.subplots_adjust(left=0.3, right=0.7)
+    TightLayoutCache(fig).tight_layout()
+    for name in ("left", "right", "bottom", "top", "hspace"):
+        assert abs(getattr(fig.subplotpars, name) - expected[name]) < 1e-3, name
+
+
+def test_missing_private_api_falls_back_to_tight_layout(monkeypatch):
+    fig = _figure()
+    fig.tight_layout()
+    expected = fig.subplotpars.left
+    fig.subplots_adjust(left=0.3)
+    cache = TightLayoutCache(fig)
+    monkeypatch.setattr(LayoutCache, "_axis_signature", lambda axis: axis._no_such_attribute)
+    cache.tight_layout()
+    assert not cache.enabled
+    assert abs(fig.subplotpars.left - expected) < 1e-6
+    cache.tight_layout()    # stays on plain tight_layout
+    assert cache.measured == 0
@@ -0,0 +1,43 @@
+import numpy as np
+
+from DataFile import load_data_file, load_data_file_lazy
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "data.txt"
+    path.write_text(text)
+    return str(path)
+
+
+def test_lazy_keeps_the_rows_of_the_eager_parse(tmp_path):
+    # The empty field of the second row drops it for every column
+    path = _write(tmp_path, "t;a;b\n0;1;2\n1;;3\n2;5;6\n")
+    eager = load_data_file(path)
+    lazy = load_data_file_lazy(path)
+    for name in ("t", "a", "b"):    # t first: its own field is fine on every row
+        np.testing.assert_array_equal(lazy.get_column(name), eager.get_column(name))
+    assert len(lazy.get_column("t")) == 2
+
+
+def test_lazy_skips_rows_with_a_text_field(tmp_path):
+    path = _write(tmp_path, "t,a\n0,1\n1,x\n2,3\n")
+    eager = load_data_file(path)
+    lazy = load_data_file_lazy(path)
+    np.testing.assert_array_equal(lazy.get_column("t"), eager.get_column("t"))
+    np.testing.assert_array_equal(lazy.get_column("a"), eager.get_column("a"))
+
+
+def test_lazy_keeps_only_the_cached_columns_of_blocks_with_gaps(tmp_path, monkeypatch):
+    import DataFile
+    monkeypatch.setattr(DataFile, "_BLOCK_BYTES", 1 << 12)
+    monkeypatch.setattr(DataFile, "_MIN_BLOCK_CHARS", 256)
+    rng = np.random.default_rng(0)
+    rows = [";".join(f"{v:.3f}" for v in row) for row in rng.normal(size=(2000, 6))]
+    for k in range(150, len(rows), 150):   # a gap in most blocks
+        rows[k] = rows[k].replace(";", ";;", 1) if k % 300 else rows[k] + ";nan"
+    path = _write(tmp_path, "a;b;c;d;e;f\n" + "\n".join(rows) + "\n")
+    eager = load_data_file(path)
+    lazy = load_data_file_lazy(path, max_cached_columns=2)
+    for name in "cafbed":
+        np.testing.assert_array_equal(lazy.get_column(name), eager.get_column(name))
+    assert lazy.nbytes == 2 * eager.get_column("a").nbytes